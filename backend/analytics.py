@@ -0,0 +1,438 @@
+"""
+Vectorized metrics analytics.
+
+A user's MetricSample history is loaded into columnar NumPy arrays laid out
+on a contiguous daily grid (missing days are NaN). Rolling 7/28-day means,
+the acute:chronic load ratio, z-scores against the personal baseline and
+trend slopes are then computed for every day in one pass using prefix sums.
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select as sa_select
+from sqlmodel import Session
+from models import MetricSample
+
+METRIC_FIELDS = ["sleep_h", "stress", "steps", "cardio", "active_min", "distance_km", "calories"]
+TREND_METRICS = ["sleep_h", "stress", "steps", "active_min"]
+INT_FIELDS = {"stress", "steps", "cardio", "active_min", "calories"}
+
+# Training load used for the acute:chronic workload ratio
+LOAD_METRIC = "active_min"
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# Minimum samples in the 28-day window before baselines are trusted
+MIN_BASELINE_SAMPLES = 14
+MIN_CHRONIC_COVERAGE = 21
+
+@dataclass
+class DayMetrics:
+    """One day's metrics, attribute-compatible with MetricSample"""
+    date: date
+    sleep_h: Optional[float] = None
+    stress: Optional[int] = None
+    steps: Optional[int] = None
+    cardio: Optional[int] = None
+    active_min: Optional[int] = None
+    distance_km: Optional[float] = None
+    calories: Optional[int] = None
+
+@dataclass
+class MetricHistory:
+    """A user's metrics as float columns on a daily grid starting at `start`"""
+    start: date
+    present: np.ndarray  # True where a sample exists for the day
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def index_of(self, day: date) -> int:
+        return (day - self.start).days
+
+    def day_at(self, index: int) -> date:
+        return self.start + timedelta(days=int(index))
+
+    def row(self, index: int) -> DayMetrics:
+        values = {}
+        for name in METRIC_FIELDS:
+            value = self.columns[name][index]
+            if np.isnan(value):
+                values[name] = None
+            else:
+                values[name] = int(value) if name in INT_FIELDS else float(value)
+        return DayMetrics(date=self.day_at(index), **values)
+
+    def latest_index(self, day: date, within_days: int) -> Optional[int]:
+        """Index of the latest sample on or before `day` and within `within_days` of it"""
+        target = self.index_of(day)
+        begin = max(target - within_days + 1, 0)
+        end = min(target, len(self) - 1)
+        if end < begin:
+            return None
+        hits = np.flatnonzero(self.present[begin:end + 1])
+        return int(begin + hits[-1]) if hits.size else None
+
+    def slice(self, start: date, end: date) -> "MetricHistory":
+        """Re-grid to [start, end], padding days outside the loaded range as missing"""
+        size = (end - start).days + 1
+        present = np.zeros(size, dtype=bool)
+        columns = {name: np.full(size, np.nan) for name in METRIC_FIELDS}
+        src_lo = max(self.index_of(start), 0)
+        src_hi = min(self.index_of(end), len(self) - 1)
+        if src_hi >= src_lo:
+            dst_lo = src_lo - self.index_of(start)
+            dst_hi = dst_lo + (src_hi - src_lo)
+            present[dst_lo:dst_hi + 1] = self.present[src_lo:src_hi + 1]
+            for name in METRIC_FIELDS:
+                columns[name][dst_lo:dst_hi + 1] = self.columns[name][src_lo:src_hi + 1]
+        return MetricHistory(start=start, present=present, columns=columns)
+
+@dataclass
+class MetricSeries:
+    """
+    Compact columnar form of a user's samples: one entry per sample day, sorted by
+    date. Floats are float64, integer metrics int32, and NULLs are tracked in a
+    (rows, metrics) mask instead of boxed None values.
+    """
+    ordinals: np.ndarray  # int32 date ordinals
+    values: Dict[str, np.ndarray]
+    nulls: np.ndarray  # True where the value is NULL, columns in METRIC_FIELDS order
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ordinals.nbytes + self.nulls.nbytes + sum(column.nbytes for column in self.values.values())
+
+    def column(self, name: str) -> np.ndarray:
+        """A metric as float64 with NaN for NULL, as the analytics math expects"""
+        column = self.values[name].astype(float)
+        column[self.nulls[:, METRIC_FIELDS.index(name)]] = np.nan
+        return column
+
+    @classmethod
+    def empty(cls) -> "MetricSeries":
+        return cls._from_columns(np.empty(0, dtype=np.int32), [np.empty(0) for _ in METRIC_FIELDS])
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "MetricSeries":
+        """Build from (date, *METRIC_FIELDS) rows sorted by date"""
+        if not rows:
+            return cls.empty()
+        dates, *raw = zip(*rows)
+        ordinals = np.fromiter((day.toordinal() for day in dates), dtype=np.int32, count=len(dates))
+        # None becomes NaN under a float dtype
+        return cls._from_columns(ordinals, [np.array(column, dtype=float) for column in raw])
+
+    @classmethod
+    def _from_columns(cls, ordinals: np.ndarray, floats: List[np.ndarray]) -> "MetricSeries":
+        nulls = np.column_stack([np.isnan(column) for column in floats]) if len(ordinals) else np.zeros((0, len(METRIC_FIELDS)), dtype=bool)
+        values = {}
+        for name, column in zip(METRIC_FIELDS, floats):
+            if name in INT_FIELDS:
+                values[name] = np.nan_to_num(column).astype(np.int32)
+            else:
+                values[name] = np.nan_to_num(column)
+        return cls(ordinals=ordinals, values=values, nulls=nulls)
+
+def _series_query(*columns):
+    """Core select of the metric columns; rows come back as plain tuples, never ORM objects"""
+    table = MetricSample.__table__
+    return sa_select(*columns, table.c.date, *[table.c[name] for name in METRIC_FIELDS])
+
+def load_series(session: Session, user_id: int, start: Optional[date] = None, end: Optional[date] = None) -> MetricSeries:
+    """Load a user's samples in [start, end] as a MetricSeries"""
+    table = MetricSample.__table__
+    query = _series_query().where(table.c.user_id == user_id)
+    if start:
+        query = query.where(table.c.date >= start)
+    if end:
+        query = query.where(table.c.date <= end)
+    rows = session.connection().execute(query.order_by(table.c.date)).all()
+    return MetricSeries.from_rows(rows)
+
+def load_series_many(session: Session, user_ids: List[int], start: date, end: date) -> Dict[int, MetricSeries]:
+    """Load several users' samples for [start, end] with a single query"""
+    table = MetricSample.__table__
+    query = (
+        _series_query(table.c.user_id)
+        .where(table.c.user_id.in_(user_ids))
+        .where(table.c.date >= start)
+        .where(table.c.date <= end)
+        .order_by(table.c.user_id, table.c.date)
+    )
+    grouped: Dict[int, List[tuple]] = {user_id: [] for user_id in user_ids}
+    for row in session.connection().execute(query):
+        grouped[row[0]].append(tuple(row[1:]))
+    return {user_id: MetricSeries.from_rows(rows) for user_id, rows in grouped.items()}
+
+def history_from_series(series: MetricSeries, start: Optional[date] = None, end: Optional[date] = None) -> MetricHistory:
+    """Lay a series out on a daily grid covering [start, end] (or the series' own span)"""
+    if not len(series):
+        size = (end - start).days + 1 if start and end else 0
+        return MetricHistory(
+            start=start or end or date.today(),
+            present=np.zeros(size, dtype=bool),
+            columns={name: np.full(size, np.nan) for name in METRIC_FIELDS},
+        )
+
+    first = start or date.fromordinal(int(series.ordinals[0]))
+    positions = series.ordinals.astype(np.int64) - first.toordinal()
+    size = int(positions[-1]) + 1
+    if end:
+        size = max(size, (end - first).days + 1)
+
+    present = np.zeros(size, dtype=bool)
+    present[positions] = True
+    columns = {}
+    for name in METRIC_FIELDS:
+        column = np.full(size, np.nan)
+        column[positions] = series.column(name)
+        columns[name] = column
+    return MetricHistory(start=first, present=present, columns=columns)
+
+def load_history(session: Session, user_id: int, start: Optional[date] = None, end: Optional[date] = None) -> MetricHistory:
+    """Load a user's samples in [start, end] on a daily grid"""
+    return history_from_series(load_series(session, user_id, start, end), start, end)
+
+def load_histories(session: Session, user_ids: List[int], start: date, end: date) -> Dict[int, MetricHistory]:
+    """Load several users' histories for [start, end] with a single query"""
+    return {
+        user_id: history_from_series(series, start, end)
+        for user_id, series in load_series_many(session, user_ids, start, end).items()
+    }
+
+class HistoryCache:
+    """
+    Per-request history cache: ranges reserved up front are fetched with one
+    query per user, and every overlapping load is served by slicing it.
+    """
+
+    def __init__(self):
+        self.loads = 0
+        self._wanted: Dict[int, Tuple[date, date]] = {}
+        self._loaded: Dict[int, MetricHistory] = {}
+
+    def reserve(self, user_id: int, start: date, end: date):
+        if user_id in self._wanted:
+            lo, hi = self._wanted[user_id]
+            start, end = min(lo, start), max(hi, end)
+        self._wanted[user_id] = (start, end)
+
+    def load(self, session: Session, user_id: int, start: date, end: date) -> MetricHistory:
+        history = self._loaded.get(user_id)
+        if history is None or start < history.start or end > history.day_at(len(history) - 1):
+            self.reserve(user_id, start, end)
+            if history is not None:
+                self.reserve(user_id, history.start, history.day_at(len(history) - 1))
+            lo, hi = self._wanted[user_id]
+            history = load_history(session, user_id, lo, hi)
+            self._loaded[user_id] = history
+            self.loads += 1
+        return history.slice(start, end)
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+
+def _window_sums(prefix: np.ndarray, window: int, lag: int = 0) -> np.ndarray:
+    """Sum over [i - lag - window + 1, i - lag] for every i, clipped at the start"""
+    n = len(prefix) - 1
+    hi = np.clip(np.arange(n) + 1 - lag, 0, n)
+    lo = np.clip(hi - window, 0, n)
+    return prefix[hi] - prefix[lo]
+
+def rolling_mean(values: np.ndarray, window: int, lag: int = 0) -> np.ndarray:
+    valid = ~np.isnan(values)
+    sums = _window_sums(_prefix(np.where(valid, values, 0.0)), window, lag)
+    counts = _window_sums(_prefix(valid), window, lag)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def rolling_std(values: np.ndarray, window: int, lag: int = 0, min_periods: int = 2) -> np.ndarray:
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    counts = _window_sums(_prefix(valid), window, lag)
+    sums = _window_sums(_prefix(filled), window, lag)
+    squares = _window_sums(_prefix(filled * filled), window, lag)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+        variance = np.maximum(squares / counts - mean * mean, 0.0)
+        return np.where(counts >= max(min_periods, 2), np.sqrt(variance), np.nan)
+
+def rolling_slope(values: np.ndarray, window: int) -> np.ndarray:
+    """Least-squares slope (units per day) over each trailing window, ignoring gaps"""
+    valid = ~np.isnan(values)
+    t = np.arange(len(values), dtype=float)
+    x = np.where(valid, values, 0.0)
+    tv = np.where(valid, t, 0.0)
+    n = _window_sums(_prefix(valid), window)
+    st = _window_sums(_prefix(tv), window)
+    sx = _window_sums(_prefix(x), window)
+    stt = _window_sums(_prefix(tv * tv), window)
+    stx = _window_sums(_prefix(tv * x), window)
+    denominator = n * stt - st * st
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where((n > 1) & (denominator > 0), (n * stx - st * sx) / denominator, np.nan)
+
+@dataclass
+class MetricsAnalysis:
+    history: MetricHistory
+    mean_7d: Dict[str, np.ndarray]
+    mean_28d: Dict[str, np.ndarray]
+    zscore: Dict[str, np.ndarray]
+    slope_7d: Dict[str, np.ndarray]
+    acwr: np.ndarray
+
+    def summary(self, index: int) -> "TrendSummary":
+        def pick(series: Dict[str, np.ndarray]) -> Dict[str, Optional[float]]:
+            return {name: _finite(values[index]) for name, values in series.items()}
+
+        return TrendSummary(
+            mean_7d=pick(self.mean_7d),
+            mean_28d=pick(self.mean_28d),
+            zscore=pick(self.zscore),
+            slope_7d=pick(self.slope_7d),
+            acwr=_finite(self.acwr[index]),
+        )
+
+@dataclass
+class TrendSummary:
+    """Analytics for one day; None where there is not enough history"""
+    mean_7d: Dict[str, Optional[float]]
+    mean_28d: Dict[str, Optional[float]]
+    zscore: Dict[str, Optional[float]]
+    slope_7d: Dict[str, Optional[float]]
+    acwr: Optional[float]
+
+def _finite(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+def analyze(history: MetricHistory) -> MetricsAnalysis:
+    """Compute rolling baselines, ACWR, z-scores and trends for every day of the history"""
+    mean_7d: Dict[str, np.ndarray] = {}
+    mean_28d: Dict[str, np.ndarray] = {}
+    zscore: Dict[str, np.ndarray] = {}
+    slope_7d: Dict[str, np.ndarray] = {}
+    for name in TREND_METRICS:
+        values = history.columns[name]
+        mean_7d[name] = rolling_mean(values, ACUTE_DAYS)
+        mean_28d[name] = rolling_mean(values, CHRONIC_DAYS)
+        # Baseline excludes the day being scored
+        baseline = rolling_mean(values, CHRONIC_DAYS, lag=1)
+        spread = rolling_std(values, CHRONIC_DAYS, lag=1, min_periods=MIN_BASELINE_SAMPLES)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            zscore[name] = np.where(spread > 0, (values - baseline) / spread, np.nan)
+        slope_7d[name] = rolling_slope(values, ACUTE_DAYS)
+
+    # Missing days count as zero load once the chronic window is well covered
+    load = np.nan_to_num(history.columns[LOAD_METRIC])
+    acute = rolling_mean(load, ACUTE_DAYS)
+    chronic = rolling_mean(load, CHRONIC_DAYS)
+    coverage = _window_sums(_prefix(history.present), CHRONIC_DAYS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        acwr = np.where((chronic > 0) & (coverage >= MIN_CHRONIC_COVERAGE), acute / chronic, np.nan)
+
+    return MetricsAnalysis(
+        history=history,
+        mean_7d=mean_7d,
+        mean_28d=mean_28d,
+        zscore=zscore,
+        slope_7d=slope_7d,
+        acwr=acwr,
+    )
+
+def trend_notes(summary: TrendSummary) -> List[str]:
+    """Short coaching notes for notable trends"""
+    notes = []
+    sleep_z = summary.zscore.get("sleep_h")
+    if sleep_z is not None and sleep_z <= -1:
+        notes.append("Sleep is well below your 28-day baseline.")
+    stress_z = summary.zscore.get("stress")
+    if stress_z is not None and stress_z >= 1:
+        notes.append("Stress is well above your 28-day baseline.")
+    sleep_slope = summary.slope_7d.get("sleep_h")
+    if sleep_slope is not None and sleep_slope <= -0.1:
+        notes.append("Sleep has been trending down this week.")
+    if summary.acwr is not None and summary.acwr > 1.5:
+        notes.append("Training load spiked versus your 4-week average.")
+    return notes
+
+# Timeline aggregation buckets
+TIMELINE_BUCKETS = ("day", "week", "month")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def bucket_history(series: MetricSeries, bucket: str = "day") -> Tuple[List[date], Dict[str, np.ndarray]]:
+    """
+    Mean of each metric per day, ISO week (Monday) or calendar month. Returns bucket
+    start dates and one float column per metric (NaN where a bucket has no values).
+    """
+    if not len(series):
+        return [], {name: np.empty(0) for name in METRIC_FIELDS}
+
+    ordinals = series.ordinals.astype(np.int64)
+    if bucket == "week":
+        # Ordinal 1 (0001-01-01) is a Monday
+        keys = ordinals - (ordinals - 1) % 7
+    elif bucket == "month":
+        months = (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]")
+        keys = months.astype("datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+    else:
+        keys = ordinals
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+    columns = {}
+    for offset, name in enumerate(METRIC_FIELDS):
+        valid = ~series.nulls[:, offset]
+        sums = np.add.reduceat(np.where(valid, series.values[name], 0).astype(float), starts)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            columns[name] = np.where(counts > 0, sums / counts, np.nan)
+    return [date.fromordinal(int(key)) for key in keys[starts]], columns
+
+def lttb_indices(x: np.ndarray, ys: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of `threshold` points
+    that best preserve the visual shape of the (n, k) series `ys` over `x`.
+    Each column is scaled to [0, 1] and triangle areas are summed across columns,
+    so one index set serves every metric; missing values contribute no area.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    lo = np.nanmin(np.where(np.isnan(ys), np.inf, ys), axis=0)
+    hi = np.nanmax(np.where(np.isnan(ys), -np.inf, ys), axis=0)
+    span = np.where(np.isfinite(hi - lo) & (hi > lo), hi - lo, 1.0)
+    scaled = (ys - np.where(np.isfinite(lo), lo, 0.0)) / span
+    x = x.astype(float)
+
+    # Bucket edges: bucket i covers [edges[i], edges[i + 1]); the last "bucket" is the final point
+    every = (n - 2) / (threshold - 2)
+    edges = np.r_[(np.arange(threshold - 1) * every).astype(np.int64) + 1, n]
+    edges[-2] = n - 1
+    valid = ~np.isnan(scaled)
+    sums = np.add.reduceat(np.where(valid, scaled, 0.0), edges[:-1], axis=0)
+    counts = np.add.reduceat(valid.astype(np.int64), edges[:-1], axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # All-NaN columns average to NaN, whose triangle area is ignored
+        avg_y = sums / counts
+    avg_x = np.add.reduceat(x, edges[:-1]) / np.diff(edges)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo_idx, hi_idx = edges[i], edges[i + 1]
+        areas = np.abs(
+            (x[a] - avg_x[i + 1]) * (scaled[lo_idx:hi_idx] - scaled[a])
+            - (x[a] - x[lo_idx:hi_idx, None]) * (avg_y[i + 1] - scaled[a])
+        )
+        a = lo_idx + int(np.argmax(np.nansum(areas, axis=1)))
+        selected[i + 1] = a
+    return selected
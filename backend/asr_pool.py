@@ -0,0 +1,186 @@
+"""
+Pre-warmed pool of upstream ASR websocket connections.
+
+Realtime ASR sessions are stateful, so a connection serves one client session
+and is closed afterwards; the pool keeps a few freshly opened connections
+ready so a new session skips the TLS and websocket handshakes. Idle
+connections are pinged and recycled in the background, and a semaphore caps
+concurrent upstream sessions: callers beyond the cap wait in line until a
+slot frees up or the queue timeout expires.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+import websockets
+from config import settings
+
+class ASRPoolTimeout(Exception):
+    """No upstream ASR session slot became free in time"""
+
+class ASRPool:
+    def __init__(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        warm_size: int,
+        max_sessions: int,
+        acquire_timeout: float,
+        health_interval: float,
+        max_idle_age: float,
+    ):
+        self.url = url
+        self.headers = headers
+        self.warm_size = warm_size
+        self.max_sessions = max(1, max_sessions)
+        self.acquire_timeout = acquire_timeout
+        self.health_interval = health_interval
+        self.max_idle_age = max_idle_age
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._slots = asyncio.Semaphore(self.max_sessions)
+        self._refill = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.in_use = 0
+        self.waiting = 0
+        self.counters = {
+            "sessions": 0,
+            "warm_hits": 0,
+            "cold_connects": 0,
+            "prewarmed": 0,
+            "connect_failures": 0,
+            "health_failures": 0,
+            "recycled": 0,
+            "queue_timeouts": 0,
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def connect(self):
+        return await websockets.connect(
+            self.url,
+            extra_headers=self.headers,
+            open_timeout=settings.asr_connect_timeout,
+            ping_interval=settings.asr_ping_interval,
+            ping_timeout=settings.asr_ping_timeout,
+            close_timeout=settings.asr_close_timeout,
+        )
+
+    async def start(self):
+        if self._task is None and self.warm_size > 0:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._idle:
+            conn, _ = self._idle.popleft()
+            await self._discard(conn)
+
+    async def _discard(self, conn):
+        try:
+            await asyncio.wait_for(conn.close(), settings.asr_close_timeout)
+        except Exception:
+            pass
+
+    async def _maintain(self):
+        """Keep warm_size healthy idle connections open"""
+        while True:
+            await self._check_idle()
+            # Don't pre-open connections that could never be used
+            target = min(self.warm_size, self.max_sessions - self.in_use)
+            while len(self._idle) < target:
+                try:
+                    conn = await self.connect()
+                except Exception as e:
+                    self.counters["connect_failures"] += 1
+                    print(f"⚠️  ASR pool could not pre-warm a connection: {e}")
+                    break
+                self._idle.append((conn, time.monotonic()))
+                self.counters["prewarmed"] += 1
+            self._refill.clear()
+            try:
+                await asyncio.wait_for(self._refill.wait(), self.health_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check_idle(self):
+        """Ping idle connections, dropping dead and stale ones"""
+        now = time.monotonic()
+        for _ in range(len(self._idle)):
+            conn, opened = self._idle.popleft()
+            if now - opened > self.max_idle_age:
+                self.counters["recycled"] += 1
+                await self._discard(conn)
+                continue
+            try:
+                await asyncio.wait_for(await conn.ping(), settings.asr_ping_timeout)
+            except Exception:
+                self.counters["health_failures"] += 1
+                await self._discard(conn)
+                continue
+            self._idle.append((conn, opened))
+
+    def _take_idle(self):
+        while self._idle:
+            conn, _ = self._idle.popleft()
+            if conn.open:
+                return conn
+            self.counters["health_failures"] += 1
+        return None
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Any]:
+        """Hold an upstream session slot and connection for the duration of one client session"""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.counters["queue_timeouts"] += 1
+            raise ASRPoolTimeout(f"All {self.max_sessions} ASR sessions busy")
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+        self.in_use += 1
+        conn = None
+        try:
+            conn = self._take_idle()
+            if conn is not None:
+                self.counters["warm_hits"] += 1
+            else:
+                self.counters["cold_connects"] += 1
+                try:
+                    conn = await self.connect()
+                except Exception:
+                    self.counters["connect_failures"] += 1
+                    raise
+            self.counters["sessions"] += 1
+            self._refill.set()
+            yield conn
+        finally:
+            self.in_use -= 1
+            self._slots.release()
+            if conn is not None:
+                await self._discard(conn)
+            self._refill.set()
+
+    def stats(self) -> Dict[str, Any]:
+        acquired = self.counters["sessions"]
+        return {
+            **self.counters,
+            "idle": len(self._idle),
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "warm_size": self.warm_size,
+            "max_sessions": self.max_sessions,
+            "avg_wait_ms": round(self._wait_total / acquired * 1000, 1) if acquired else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 1),
+        }
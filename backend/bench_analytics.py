@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Metrics analytics benchmark
+Seeds one user with years of daily metrics on a scratch SQLite database and
+times analytics.py: loading the history, the vectorized analysis (rolling
+means, z-scores, slopes, ACWR for every day) and scoring readiness for every
+day, next to a per-day Python loop computing the same rolling means and z-scores:
+
+    python bench_analytics.py --years 5 --repeat 20
+"""
+
+import math
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from bench_common import bench_parser, best_of, scratch_database
+
+def main(argv: Optional[List[str]] = None):
+    parser = bench_parser("Benchmark vectorized metrics analytics")
+    parser.add_argument("--years", type=float, default=5, help="Years of daily data for the user")
+    parser.add_argument("--gap-rate", type=float, default=0.1, help="Fraction of days without a sample")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement (best is reported)")
+    args = parser.parse_args(argv)
+
+    database = scratch_database(args.database, "bench_analytics.db")
+    from sqlmodel import Session
+    from analytics import ACUTE_DAYS, CHRONIC_DAYS, MIN_BASELINE_SAMPLES, TREND_METRICS, analyze, load_history
+    from db import create_db_and_tables, engine, upsert_rows
+    from models import MetricSample, User
+    from readiness_engine import score_history
+
+    create_db_and_tables()
+    rng = random.Random(7)
+    days = int(args.years * 365.25)
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    with Session(engine) as session:
+        user = User(email="bench@example.com", name="Bench")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+        rows = [
+            dict(
+                user_id=user_id,
+                date=start + timedelta(days=i),
+                sleep_h=round(rng.gauss(7.3, 0.8), 2),
+                stress=max(0, min(100, int(rng.gauss(35, 12)))),
+                steps=max(0, int(rng.gauss(9000, 2500))),
+                cardio=int(rng.gauss(50, 10)),
+                active_min=max(0, int(rng.gauss(45, 20))),
+                distance_km=round(rng.uniform(2, 12), 2),
+                calories=int(rng.gauss(2300, 200)),
+            )
+            for i in range(days)
+            if rng.random() >= args.gap_rate
+        ]
+        upsert_rows(session, MetricSample, rows, ["user_id", "date"])
+        session.commit()
+    print(f"🚀 {len(rows)} samples over {days} days ({start}..{end}) in {database}")
+
+    with Session(engine) as session:
+        history = load_history(session, user_id, start, end)
+        load_s = best_of(lambda: load_history(session, user_id, start, end), args.repeat)
+    analysis = analyze(history)
+    analyze_s = best_of(lambda: analyze(history), args.repeat)
+    score_s = best_of(lambda: score_history(history, start, end), max(1, args.repeat // 5))
+
+    def per_day_loop() -> Dict[str, List[Optional[float]]]:
+        """Reference: rolling means and baseline z-scores recomputed day by day"""
+        out: Dict[str, List[Optional[float]]] = {}
+        for name in TREND_METRICS:
+            values = [None if math.isnan(v) else float(v) for v in history.columns[name]]
+            zscores: List[Optional[float]] = []
+            for i in range(len(values)):
+                for window in (ACUTE_DAYS, CHRONIC_DAYS):
+                    recent = [v for v in values[max(0, i - window + 1):i + 1] if v is not None]
+                    _ = sum(recent) / len(recent) if recent else None
+                baseline = [v for v in values[max(0, i - CHRONIC_DAYS):i] if v is not None]
+                z = None
+                if values[i] is not None and len(baseline) >= MIN_BASELINE_SAMPLES:
+                    mean = sum(baseline) / len(baseline)
+                    spread = math.sqrt(sum((v - mean) ** 2 for v in baseline) / len(baseline))
+                    z = (values[i] - mean) / spread if spread > 0 else None
+                zscores.append(z)
+            out[name] = zscores
+        return out
+
+    reference = per_day_loop()
+    loop_s = best_of(per_day_loop, max(1, args.repeat // 10))
+    worst = max(
+        abs(expected - analysis.zscore[name][i])
+        for name in TREND_METRICS
+        for i, expected in enumerate(reference[name])
+        if expected is not None
+    )
+
+    n = len(history)
+    print(f"load_history:        {load_s * 1000:8.2f} ms")
+    print(f"analyze:             {analyze_s * 1000:8.2f} ms ({n / analyze_s:,.0f} days/s)")
+    print(f"score every day:     {score_s * 1000:8.2f} ms ({n / score_s:,.0f} days/s)")
+    print(f"per-day Python loop: {loop_s * 1000:8.2f} ms (means and z-scores only; {loop_s / analyze_s:.0f}x analyze)")
+    print(f"max z-score difference vs loop: {worst:.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Shared helpers for the bench_*.py scripts: best-of timing and the scratch
+SQLite database the database benchmarks run against.
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+def best_of(fn: Callable[[], Any], repeat: int, number: int = 1) -> float:
+    """Best wall time per call in seconds, over `repeat` rounds of `number` calls (as timeit.repeat)"""
+    best = math.inf
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / number
+
+def bench_parser(description: str, database: bool = True) -> argparse.ArgumentParser:
+    """Argument parser for a benchmark; database benchmarks also take --database"""
+    parser = argparse.ArgumentParser(description=description)
+    if database:
+        parser.add_argument("--database", type=Path, help="Scratch SQLite file (default: a temporary file)")
+    return parser
+
+def scratch_database(path: Optional[Path], name: str) -> Path:
+    """
+    Point DATABASE_URL at an empty SQLite file, `path` or a temporary `name`.
+    Call before importing config, db or models: the engines are created on import.
+    """
+    database = path or Path(tempfile.mkdtemp()) / name
+    if database.exists():
+        database.unlink()
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    return database
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark
+Renders typical API payloads three ways and prints requests/sec for each:
+
+- stdlib: FastAPI's default path, validating against `response_model` and
+  writing with JSONResponse (json.dumps)
+- orjson: the same `response_model` pass, written with FastJSONResponse
+- direct: the handler returns FastJSONResponse(model), which pydantic-core
+  writes straight from the models
+
+    python bench_json.py --repeat 2000
+"""
+
+import asyncio
+from datetime import date, timedelta
+from typing import List, Optional
+
+from bench_common import bench_parser, best_of
+
+def main(argv: Optional[List[str]] = None):
+    parser = bench_parser("Benchmark response serialization paths", database=False)
+    parser.add_argument("--repeat", type=int, default=2000, help="Renders per case and path (scaled down for large payloads)")
+    args = parser.parse_args(argv)
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from responses import FastJSONResponse, orjson_available
+    from schemas.api import DiaryEntryResponse, GoalResponse, MetricTimelineItem
+    from schemas.tools import GetCurrentMetricsResponse, MetricFactor
+
+    today = date.today()
+    timeline = [
+        MetricTimelineItem(
+            date=str(today - timedelta(days=i)), sleep=7.0 + i % 5 * 0.25, stress=30 + i % 40,
+            steps=6000 + i * 37 % 6000, cardio=40 + i % 20, active=30 + i % 45,
+            dist=5.0 + i % 7 * 0.5, cal=2100 + i % 9 * 40
+        )
+        for i in range(500)
+    ]
+    diary = [
+        DiaryEntryResponse(id=i, date=str(today - timedelta(days=i)), type="note", text=f"Easy run, felt fine #{i}")
+        for i in range(200)
+    ]
+    goals = [
+        GoalResponse(id=i, category="fitness", text=f"Run 5k under {25 + i % 5} minutes", created=str(today))
+        for i in range(50)
+    ]
+    metrics = GetCurrentMetricsResponse(
+        userId="1", date=str(today),
+        currentMetrics={"sleep_h": 7.4, "stress": 32, "steps": 9120, "cardio": 51, "active_min": 48},
+        readinessScore=78, readinessStatus="good", recommendation="Moderate training is fine today",
+        factors=[
+            MetricFactor(name=name, value=value, unit=unit, impact="positive", description=f"{name} near baseline")
+            for name, value, unit in (("sleep", 7.4, "h"), ("stress", 32, ""), ("cardio", 51, "bpm"))
+        ],
+        notes=""
+    )
+    cases = (
+        ("timeline x500", List[MetricTimelineItem], timeline),
+        ("diary x200", List[DiaryEntryResponse], diary),
+        ("goals x50", List[GoalResponse], goals),
+        ("getCurrentMetrics", GetCurrentMetricsResponse, metrics),
+    )
+
+    loop = asyncio.new_event_loop()
+
+    def through_response_model(field, content, response_class):
+        def render():
+            data = loop.run_until_complete(serialize_response(field=field, response_content=content))
+            return response_class(data).body
+        return render
+
+    print(f"🚀 Rendering responses (orjson {'available' if orjson_available() else 'not installed'})")
+    print(f"{'case':>18}  {'stdlib':>10}  {'orjson':>10}  {'direct':>10}  (requests/s)")
+    for name, type_, content in cases:
+        field = create_response_field(name="response", type_=type_)
+        paths = (
+            through_response_model(field, content, JSONResponse),
+            through_response_model(field, content, FastJSONResponse),
+            lambda: FastJSONResponse(content).body,
+        )
+        repeat = max(10, args.repeat * 50 // max(50, len(content) if isinstance(content, list) else 50))
+        rates = [1 / best_of(render, 5, number=repeat) for render in paths]
+        print(f"{name:>18}  " + "  ".join(f"{rate:10,.0f}" for rate in rates))
+    loop.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Request latency load test
+Drives a running backend with concurrent clients that mix readers (the agent
+getCurrentMetrics tool and the frontend metrics timeline) with writers (a
+one-day metrics import, as a device sync sends, and diary entries), then
+prints p50/p95/p99 latency and throughput per endpoint:
+
+    uvicorn main:app --port 8000 --workers 1 &
+    python bench_load.py --url http://localhost:8000 --requests 2000 --concurrency 50 --write-percent 20
+
+Writes go to the demo user, the same user the reads are for, so every import
+rescores that user's readiness snapshots and invalidates their cached timeline.
+--write-percent 0 runs readers only. Timeline responses are cached per query;
+--bust-cache varies the `points` parameter so every timeline request reaches
+the database.
+"""
+
+import asyncio
+import os
+import random
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench_common import bench_parser
+
+READS = ["getCurrentMetrics", "timeline"]
+WRITES = ["metricsImport", "diary"]
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def schedule(write_percent: int, seed: int = 7) -> List[str]:
+    """100 endpoint slots, `write_percent` of them writes, in a fixed shuffled order"""
+    writes = max(0, min(100, write_percent))
+    slots = [WRITES[i % len(WRITES)] for i in range(writes)]
+    slots += [READS[i % len(READS)] for i in range(100 - writes)]
+    random.Random(seed).shuffle(slots)
+    return slots
+
+async def run(
+    url: str,
+    total: int,
+    concurrency: int,
+    agent_token: str,
+    bust_cache: bool,
+    write_percent: int = 20,
+) -> Dict[str, List[float]]:
+    slots = schedule(write_percent)
+    names = [name for name in READS + WRITES if name in slots]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    counter = iter(range(total))
+    headers = {"Authorization": f"Bearer {agent_token}"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    today = date.today().isoformat()
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        async def call(i: int):
+            name = slots[i % len(slots)]
+            if name == "getCurrentMetrics":
+                request = client.post("/tools/getCurrentMetrics", json={}, headers=headers)
+            elif name == "timeline":
+                params = {"period": "month"}
+                if bust_cache:
+                    params["points"] = 3 + i % 1000
+                request = client.get("/api/metrics/timeline", params=params)
+            elif name == "metricsImport":
+                csv_data = f"date,sleep,stress,steps,cardio,active,dist,cal\n{today},7.{i % 10},{30 + i % 20},{8000 + i % 3000},50,{40 + i % 20},6.5,2200"
+                request = client.post("/api/metrics/import", json={"csv_data": csv_data})
+            else:
+                request = client.post("/api/diary", json={"type": "note", "text": f"Load test entry {i}"})
+            started = time.perf_counter()
+            response = await request
+            elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                latencies[name].append(elapsed)
+            else:
+                errors[name] += 1
+
+        async def worker():
+            for i in counter:
+                await call(i)
+
+        # Warm up connections, caches and the user identity cache
+        for i in range(min(concurrency, 20)):
+            await call(i)
+        for samples in latencies.values():
+            samples.clear()
+        for name in errors:
+            errors[name] = 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    done = sum(len(samples) for samples in latencies.values())
+    print(
+        f"🚀 {done} requests in {wall:.2f}s ({done / wall:.0f} req/s) with {concurrency} concurrent clients, "
+        f"{max(0, min(100, write_percent))}% writes"
+    )
+    for name, samples in latencies.items():
+        if not samples:
+            print(f"{name:>18}: no successful requests ({errors[name]} errors)")
+            continue
+        print(
+            f"{name:>18}: p50 {percentile(samples, 50) * 1000:7.1f} ms   p95 {percentile(samples, 95) * 1000:7.1f} ms   "
+            f"p99 {percentile(samples, 99) * 1000:7.1f} ms   max {max(samples) * 1000:7.1f} ms   "
+            f"({len(samples)} ok, {errors[name]} errors)"
+        )
+    return latencies
+
+def main(argv: Optional[List[str]] = None):
+    parser = bench_parser("Load test reads and writes against a running backend", database=False)
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests across all endpoints")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients")
+    parser.add_argument("--write-percent", type=int, default=20, help="Share of requests that are writes (0-100)")
+    parser.add_argument("--agent-token", default=os.getenv("AGENT_TOKEN", "your-agent-token-change-in-production"))
+    parser.add_argument("--bust-cache", action="store_true", help="Vary timeline queries to bypass the response cache")
+    args = parser.parse_args(argv)
+
+    asyncio.run(run(args.url, args.requests, args.concurrency, args.agent_token, args.bust_cache, args.write_percent))
+
+if __name__ == "__main__":
+    main()
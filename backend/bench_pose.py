@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Pose analysis benchmark
+Builds synthetic squat sequences (side view, with keypoint jitter and some
+low-confidence frames) in the analyzePose request format and times
+pose_engine.pack_keypoints and pose_engine.analyze separately, printing
+frames/sec for each:
+
+    python bench_pose.py --frames 30 300 1800 5400 --repeat 20
+
+--format list sends each keypoint as [x, y, score] instead of {"x", "y", "score"}.
+"""
+
+import math
+import random
+from typing import Any, Dict, List, Optional
+
+from bench_common import bench_parser, best_of
+
+def squat_frames(count: int, as_list: bool, seed: int = 7) -> List[Dict[str, Any]]:
+    """`count` frames of repeated squats, about 2 seconds per rep at 30 fps"""
+    rng = random.Random(seed)
+    frames = []
+    for t in range(count):
+        depth = (1 - math.cos(2 * math.pi * t / 60)) / 2
+        joints = {
+            "shoulder": (0.50 - 0.05 * depth, 0.25 + 0.25 * depth),
+            "elbow": (0.62, 0.38 + 0.20 * depth),
+            "wrist": (0.74, 0.36 + 0.20 * depth),
+            "hip": (0.50 - 0.15 * depth, 0.50 + 0.22 * depth),
+            "knee": (0.52 + 0.08 * depth, 0.72),
+            "ankle": (0.50, 0.95),
+        }
+        # Every 50th frame the detector loses the lower body
+        occluded = t % 50 == 49
+        keypoints = {}
+        for side, offset in (("left", -0.01), ("right", 0.01)):
+            for joint, (x, y) in joints.items():
+                score = 0.1 if occluded and joint in ("knee", "ankle") else rng.uniform(0.6, 1.0)
+                x, y = x + offset + rng.gauss(0, 0.004), y + rng.gauss(0, 0.004)
+                keypoints[f"{side}_{joint}"] = [x, y, score] if as_list else {"x": x, "y": y, "score": score}
+        frames.append({"keypoints": keypoints})
+    return frames
+
+def main(argv: Optional[List[str]] = None):
+    parser = bench_parser("Benchmark keypoint packing and pose analysis", database=False)
+    parser.add_argument("--frames", type=int, nargs="+", default=[30, 300, 1800, 5400], help="Sequence lengths")
+    parser.add_argument("--exercise", default="squat", help="Exercise profile to check (empty for none)")
+    parser.add_argument("--format", choices=["dict", "list"], default="dict", help="Keypoint encoding")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement (best is reported)")
+    args = parser.parse_args(argv)
+
+    from config import settings
+    from pose_engine import analyze, pack_keypoints
+
+    min_score, threshold = settings.pose_min_keypoint_score, settings.pose_asymmetry_threshold
+    exercise = args.exercise or None
+    max_frames = max(args.frames)
+    print(f"🚀 Synthetic {exercise or 'unlabeled'} sequences, {args.format} keypoints, best of {args.repeat}")
+    print(f"{'frames':>7}  {'pack_keypoints':>27}  {'analyze':>27}  {'total':>15}")
+    for count in args.frames:
+        keypoints = squat_frames(count, args.format == "list")
+        points = pack_keypoints(keypoints, max_frames)
+        result = analyze(points, exercise, min_score, threshold)
+        pack_s = best_of(lambda: pack_keypoints(keypoints, max_frames), args.repeat)
+        analyze_s = best_of(lambda: analyze(points, exercise, min_score, threshold), args.repeat)
+        total = pack_s + analyze_s
+        print(
+            f"{count:>7}  {pack_s * 1000:8.2f} ms {count / pack_s:11,.0f} f/s  "
+            f"{analyze_s * 1000:8.2f} ms {count / analyze_s:11,.0f} f/s  {count / total:11,.0f} f/s"
+        )
+    print(f"Last sequence: flags {result.flags or 'none'}, valid fraction {result.valid_fraction:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Metric series loading benchmark
+Compares loading one user's metric history as ORM MetricSample objects
+(copied into NumPy columns, as before MetricSeries) with the columnar
+analytics.load_series, on a scratch SQLite database. Reports best-of-N wall
+time and, from tracemalloc, the memory still held by the loaded result:
+
+    python bench_series.py --rows 10000 --repeat 5
+"""
+
+import gc
+import random
+import tracemalloc
+from datetime import date, timedelta
+from typing import Any, Callable, List, Optional, Tuple
+
+from bench_common import bench_parser, best_of, scratch_database
+
+def measure(load: Callable[[], Any], repeat: int) -> Tuple[float, int, int]:
+    """(best seconds, peak bytes, retained bytes) for a loader"""
+    best = best_of(load, repeat)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = load()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    del result
+    return best, peak, retained
+
+def main(argv: Optional[List[str]] = None):
+    parser = bench_parser("Benchmark columnar metric loading against ORM rows")
+    parser.add_argument("--rows", type=int, default=10000, help="Daily samples for the user")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per loader (best is reported)")
+    args = parser.parse_args(argv)
+
+    database = scratch_database(args.database, "bench_series.db")
+    import numpy as np
+    from sqlmodel import Session, select
+    from analytics import METRIC_FIELDS, load_series
+    from db import create_db_and_tables, engine, upsert_rows
+    from models import MetricSample, User
+
+    create_db_and_tables()
+    rng = random.Random(7)
+    start = date.today() - timedelta(days=args.rows - 1)
+    with Session(engine) as session:
+        user = User(email="bench@example.com", name="Bench")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+        rows = [
+            dict(
+                user_id=user_id,
+                date=start + timedelta(days=i),
+                sleep_h=round(rng.gauss(7.3, 0.8), 2),
+                stress=int(rng.gauss(35, 12)),
+                steps=int(rng.gauss(9000, 2500)),
+                cardio=int(rng.gauss(50, 10)),
+                active_min=int(rng.gauss(45, 20)),
+                distance_km=round(rng.uniform(2, 12), 2),
+                calories=int(rng.gauss(2300, 200)) if rng.random() > 0.1 else None,
+            )
+            for i in range(args.rows)
+        ]
+        for i in range(0, len(rows), 5000):
+            upsert_rows(session, MetricSample, rows[i:i + 5000], ["user_id", "date"])
+        session.commit()
+    print(f"🚀 {args.rows} samples for one user in {database}")
+
+    def orm_rows():
+        """The old path: ORM objects, then one float column per metric"""
+        with Session(engine) as session:
+            samples = session.exec(
+                select(MetricSample).where(MetricSample.user_id == user_id).order_by(MetricSample.date)
+            ).all()
+            columns = {
+                name: np.array([getattr(sample, name) for sample in samples], dtype=float)
+                for name in METRIC_FIELDS
+            }
+            # The session's identity map keeps every object alive along with the columns
+            return samples, columns
+
+    def series():
+        with Session(engine) as session:
+            return load_series(session, user_id)
+
+    loaded = series()
+    print(f"{'loader':>12}  {'best':>9}  {'peak':>10}  {'retained':>10}")
+    for name, load in (("ORM rows", orm_rows), ("MetricSeries", series)):
+        best, peak, retained = measure(load, args.repeat)
+        print(f"{name:>12}  {best * 1000:7.1f} ms  {peak / 2**20:6.2f} MiB  {retained / 2**20:6.2f} MiB")
+    print(f"MetricSeries column data: {loaded.nbytes / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Metric import benchmark
+Times db.upsert_rows against the old per-row path (SELECT the day, then add or
+update it through the ORM) on a scratch SQLite database:
+
+    python bench_upsert.py --rows 20000 --batch-size 1000
+
+Each path imports the same rows twice: once into empty tables (all inserts)
+and once more over them (all conflicts, i.e. a re-import).
+
+Then, with other users' history added (--query-users x --query-days), it
+prints SQLite's EXPLAIN QUERY PLAN for the range queries behind the metrics
+timeline, getCurrentMetrics and readiness scoring, and times them with the
+(user_id, date) index and again after dropping it.
+"""
+
+import sqlite3
+from contextlib import closing
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bench_common import bench_parser, best_of, scratch_database
+
+def metric_rows(user_id: int, count: int) -> List[Dict[str, Any]]:
+    start = date.today() - timedelta(days=count)
+    return [
+        dict(
+            user_id=user_id,
+            date=start + timedelta(days=i),
+            sleep_h=7.0 + (i % 5) * 0.25,
+            stress=30 + i % 40,
+            steps=6000 + (i * 37) % 6000,
+            cardio=40 + i % 20,
+            active_min=30 + i % 45,
+            distance_km=5.0 + (i % 7) * 0.5,
+            calories=2100 + (i % 9) * 40,
+        )
+        for i in range(count)
+    ]
+
+def main(argv: Optional[List[str]] = None):
+    parser = bench_parser("Benchmark metric upserts against per-row writes")
+    parser.add_argument("--rows", type=int, default=20000, help="Metric rows imported per run")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per upsert statement and commit")
+    parser.add_argument("--query-users", type=int, default=200, help="Other users seeded before the query plans")
+    parser.add_argument("--query-days", type=int, default=365, help="Days of metrics per other user")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per query timing (best is reported)")
+    args = parser.parse_args(argv)
+
+    database = scratch_database(args.database, "bench_upsert.db")
+    from sqlalchemy import event, text
+    from sqlmodel import Session, delete, select
+    from analytics import load_history, load_series
+    from db import create_db_and_tables, engine, upsert_rows
+    from models import MetricSample, User
+    from readiness_engine import history_range
+    from routers.tools.get_current_metrics import _history_range
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        user = User(email="bench@example.com", name="Bench")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+    rows = metric_rows(user_id, args.rows)
+    batches = [rows[i:i + args.batch_size] for i in range(0, len(rows), args.batch_size)]
+
+    def per_row(session: Session, batch: List[Dict[str, Any]]):
+        for row in batch:
+            existing = session.exec(
+                select(MetricSample)
+                .where(MetricSample.user_id == row["user_id"])
+                .where(MetricSample.date == row["date"])
+            ).first()
+            if existing is None:
+                session.add(MetricSample(**row))
+            else:
+                for key, value in row.items():
+                    setattr(existing, key, value)
+        session.commit()
+
+    def upsert(session: Session, batch: List[Dict[str, Any]]):
+        upsert_rows(session, MetricSample, batch, ["user_id", "date"])
+        session.commit()
+
+    def import_all(write: Callable[[Session, List[Dict[str, Any]]], None]):
+        with Session(engine) as session:
+            for batch in batches:
+                write(session, batch)
+
+    print(f"🚀 Importing {len(rows)} rows in batches of {args.batch_size} into {database}")
+    for name, write in (("per-row", per_row), ("upsert", upsert)):
+        with Session(engine) as session:
+            session.exec(delete(MetricSample))
+            session.commit()
+        inserted = best_of(lambda: import_all(write), 1)
+        reimported = best_of(lambda: import_all(write), 1)
+        print(
+            f"{name:>8}: insert {inserted * 1000:8.1f} ms ({len(rows) / inserted:9,.0f} rows/s)   "
+            f"re-import {reimported * 1000:8.1f} ms ({len(rows) / reimported:9,.0f} rows/s)"
+        )
+
+
+    # The range queries behind the read paths, on a table shared with other users
+    with Session(engine) as session:
+        for other in range(args.query_users):
+            user = User(email=f"other{other}@example.com", name="Other")
+            session.add(user)
+            session.flush()
+            upsert_rows(session, MetricSample, metric_rows(user.id, args.query_days), ["user_id", "date"])
+        session.commit()
+        total = session.exec(text("SELECT count(*) FROM metricsample")).one()[0]
+
+    today = date.today()
+    queries: List[Tuple[str, Callable[[Session], Any]]] = [
+        ("timeline (month)", lambda session: load_series(session, user_id, today - timedelta(days=30), today)),
+        ("getCurrentMetrics", lambda session: load_history(session, user_id, *_history_range())),
+        ("readiness score", lambda session: load_history(session, user_id, *history_range(today))),
+    ]
+
+    def statement(load: Callable[[Session], Any]) -> Tuple[str, Any]:
+        """The SQL and parameters a loader sends"""
+        captured = []
+        listener = lambda conn, cursor, sql, params, context, many: captured.append((sql, params))
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            with Session(engine) as session:
+                load(session)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return next((sql, params) for sql, params in captured if "metricsample" in sql)
+
+    def report(label: str) -> Dict[str, float]:
+        print(f"\n{label}:")
+        timings = {}
+        for name, load in queries:
+            sql, params = statement(load)
+            # A fresh connection, so no cached statement predates the index change
+            with closing(sqlite3.connect(database)) as conn:
+                plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            with Session(engine) as session:
+                timings[name] = best_of(lambda: load(session), args.repeat)
+            steps = "; ".join(row[-1] for row in plan)
+            print(f"{name:>18}: {timings[name] * 1000:7.3f} ms   {steps}")
+        return timings
+
+    print(f"\n🚀 Range queries for one user among {total} samples ({args.query_users + 1} users)")
+    indexed = report("With ix_metricsample_user_id_date")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_metricsample_user_id_date")
+    try:
+        scanned = report("Without the index")
+    finally:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE UNIQUE INDEX ix_metricsample_user_id_date ON metricsample (user_id, date)")
+    print()
+    for name, _ in queries:
+        print(f"{name:>18}: {scanned[name] / indexed[name]:5.1f}x faster with the index")
+
+if __name__ == "__main__":
+    main()
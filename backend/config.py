@@ -5,15 +5,62 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     # Database
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./fitness_coach.db")
+    # Derived from database_url (aiosqlite / asyncpg) unless set explicitly
+    async_database_url: Optional[str] = os.getenv("ASYNC_DATABASE_URL")
+    
+    # Database connection pool (per engine; ignored for in-memory SQLite)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+    
+    # SQLite pragmas applied on every new connection
+    sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    sqlite_cache_size: int = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))  # negative = KiB
+    
+    # Metrics import
+    metrics_import_batch_size: int = int(os.getenv("METRICS_IMPORT_BATCH_SIZE", "1000"))
+    
+    # Serialized timeline responses cached per (user, query)
+    timeline_cache_max_size: int = int(os.getenv("TIMELINE_CACHE_MAX_SIZE", "1024"))
+    # Timelines longer than this are LTTB-downsampled
+    timeline_max_points: int = int(os.getenv("TIMELINE_MAX_POINTS", "500"))
     
     # Authentication
     jwt_secret: str = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 30
     
+    # Resolved-user identity cache
+    user_cache_ttl_seconds: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+    user_cache_max_size: int = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+    
     # Agent Tools
     agent_token: str = os.getenv("AGENT_TOKEN", "your-agent-token-change-in-production")
-    
+    tool_batch_max_calls: int = int(os.getenv("TOOL_BATCH_MAX_CALLS", "20"))
+    # Current-week workout plans cached per user; conflicting updates are re-applied this many times
+    plan_cache_max_size: int = int(os.getenv("PLAN_CACHE_MAX_SIZE", "1024"))
+    plan_update_max_retries: int = int(os.getenv("PLAN_UPDATE_MAX_RETRIES", "3"))
+    # Workout history pages (default and largest allowed limit)
+    workout_history_page_size: int = int(os.getenv("WORKOUT_HISTORY_PAGE_SIZE", "50"))
+    workout_history_max_page_size: int = int(os.getenv("WORKOUT_HISTORY_MAX_PAGE_SIZE", "200"))
+    # Pose analysis: keypoints scored below this are ignored; asymmetry threshold in degrees
+    pose_min_keypoint_score: float = float(os.getenv("POSE_MIN_KEYPOINT_SCORE", "0.3"))
+    pose_asymmetry_threshold: float = float(os.getenv("POSE_ASYMMETRY_THRESHOLD", "15"))
+    pose_max_frames: int = int(os.getenv("POSE_MAX_FRAMES", "5400"))
+    # Tool call audit log: bounded in-memory queue flushed to ToolLog in batches
+    tool_log_enabled: bool = os.getenv("TOOL_LOG_ENABLED", "true").lower() == "true"
+    tool_log_queue_size: int = int(os.getenv("TOOL_LOG_QUEUE_SIZE", "10000"))
+    tool_log_batch_size: int = int(os.getenv("TOOL_LOG_BATCH_SIZE", "200"))
+    tool_log_flush_interval: float = float(os.getenv("TOOL_LOG_FLUSH_INTERVAL", "1.0"))
+    # Write tool replays by request_id (TTL in seconds); persisting keeps them across restarts and workers
+    idempotency_ttl: float = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    idempotency_max_size: int = int(os.getenv("IDEMPOTENCY_MAX_SIZE", "10000"))
+    idempotency_persist: bool = os.getenv("IDEMPOTENCY_PERSIST", "true").lower() == "true"
+
     # Server
     port: int = int(os.getenv("PORT", "8000"))
     
@@ -24,6 +71,55 @@ class Settings(BaseSettings):
     elevenlabs_api_key: Optional[str] = None
     elevenlabs_voice_id: str = "21m00Tcm4TlvDq8ikWAM"
     elevenlabs_model: str = "eleven_multilingual_v2"
+    elevenlabs_base_url: str = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+    
+    elevenlabs_asr_url: str = os.getenv("ELEVENLABS_ASR_URL", "wss://api.elevenlabs.io/v1/convai/realtime")
+    
+    # ASR relay: bounded audio queue ("drop_oldest" or "coalesce" when full) and timeouts in seconds
+    asr_queue_max_frames: int = int(os.getenv("ASR_QUEUE_MAX_FRAMES", "50"))
+    asr_queue_max_bytes: int = int(os.getenv("ASR_QUEUE_MAX_BYTES", str(1024 * 1024)))
+    asr_queue_policy: str = os.getenv("ASR_QUEUE_POLICY", "coalesce")
+    asr_idle_timeout: float = float(os.getenv("ASR_IDLE_TIMEOUT", "30"))
+    asr_connect_timeout: float = float(os.getenv("ASR_CONNECT_TIMEOUT", "10"))
+    asr_ping_interval: float = float(os.getenv("ASR_PING_INTERVAL", "10"))
+    asr_ping_timeout: float = float(os.getenv("ASR_PING_TIMEOUT", "10"))
+    asr_close_timeout: float = float(os.getenv("ASR_CLOSE_TIMEOUT", "2"))
+    
+    # ASR input pipeline: client PCM16 mono is re-framed, resampled and silence-gated before relaying
+    asr_input_sample_rate: int = int(os.getenv("ASR_INPUT_SAMPLE_RATE", "16000"))  # default when the client doesn't say
+    asr_upstream_sample_rate: int = int(os.getenv("ASR_UPSTREAM_SAMPLE_RATE", "16000"))
+    asr_frame_ms: int = int(os.getenv("ASR_FRAME_MS", "30"))
+    asr_vad_enabled: bool = os.getenv("ASR_VAD_ENABLED", "true").lower() == "true"
+    asr_vad_threshold_dbfs: float = float(os.getenv("ASR_VAD_THRESHOLD_DBFS", "-45"))
+    asr_vad_preroll_ms: int = int(os.getenv("ASR_VAD_PREROLL_MS", "90"))
+    asr_vad_hangover_ms: int = int(os.getenv("ASR_VAD_HANGOVER_MS", "300"))
+    
+    # Upstream ASR connection pool: pre-warmed idle connections and concurrent session cap
+    asr_pool_warm_size: int = int(os.getenv("ASR_POOL_WARM_SIZE", "2"))
+    asr_max_sessions: int = int(os.getenv("ASR_MAX_SESSIONS", "20"))
+    asr_session_queue_timeout: float = float(os.getenv("ASR_SESSION_QUEUE_TIMEOUT", "5"))
+    asr_pool_health_interval: float = float(os.getenv("ASR_POOL_HEALTH_INTERVAL", "15"))
+    asr_pool_max_idle_age: float = float(os.getenv("ASR_POOL_MAX_IDLE_AGE", "60"))
+    
+    # TTS audio cache (memory LRU spilling to disk; empty TTS_CACHE_DIR disables the disk tier)
+    tts_cache_enabled: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    tts_cache_memory_bytes: int = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+    tts_cache_dir: str = os.getenv("TTS_CACHE_DIR", "./tts_cache")
+    tts_cache_disk_bytes: int = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+    tts_stream_chunk_bytes: int = int(os.getenv("TTS_STREAM_CHUNK_BYTES", "16384"))
+    # Pre-synthesize canned coaching phrases in the background at startup
+    tts_warmup_enabled: bool = os.getenv("TTS_WARMUP_ENABLED", "true").lower() == "true"
+    tts_warmup_concurrency: int = int(os.getenv("TTS_WARMUP_CONCURRENCY", "4"))
+    
+    # Shared upstream HTTP client (timeouts in seconds)
+    http_connect_timeout: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    http_read_timeout: float = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+    http_write_timeout: float = float(os.getenv("HTTP_WRITE_TIMEOUT", "10"))
+    http_pool_timeout: float = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+    http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    http_max_keepalive: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+    http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    http2_enabled: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
     
     class Config:
         env_file = ".env"
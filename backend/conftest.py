@@ -0,0 +1,53 @@
+"""
+pytest setup: the app runs in-process against a scratch SQLite database.
+
+test_api.py and test_get_current_metrics.py are manual scripts for a running
+server (`python test_api.py`) and are not collected.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import pytest
+
+# Set before anything imports config/db so the engines point at the scratch database
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["TOOL_LOG_FLUSH_INTERVAL"] = "0.01"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+collect_ignore = ["test_api.py", "test_get_current_metrics.py"]
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture(scope="session")
+def agent() -> dict:
+    from config import settings
+
+    return {"Authorization": f"Bearer {settings.agent_token}"}
+
+@pytest.fixture
+def tool_log_rows() -> Callable[..., List]:
+    """Wait for the background writer and return the ToolLog rows matching `where`"""
+    from sqlmodel import Session, select
+    from db import engine
+    from models import ToolLog
+
+    def rows(*where, count: int = 1, timeout: float = 2.0) -> List[ToolLog]:
+        deadline = time.monotonic() + timeout
+        while True:
+            with Session(engine) as session:
+                found = session.exec(select(ToolLog).where(*where).order_by(ToolLog.id)).all()
+            if len(found) >= count or time.monotonic() > deadline:
+                return found
+            time.sleep(0.02)
+
+    return rows
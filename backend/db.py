@@ -1,18 +1,225 @@
-from sqlmodel import SQLModel, create_engine, Session
+from typing import Any, Dict, List, Type
+from sqlalchemy import event, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, create_engine, Session, delete, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from config import settings
 
-# Create engine
+# Async drivers used for each database backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL to the equivalent async-driver URL"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _pool_options(url: str) -> Dict[str, Any]:
+    """Pool arguments from settings; in-memory SQLite keeps its single-connection pool"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+    }
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in sqlite_pragmas().items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+# Create engine (scripts, seeding and background jobs)
 engine = create_engine(
     settings.database_url,
     echo=False,  # Set to True for SQL logging
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+    connect_args={"check_same_thread": False} if _is_sqlite(settings.database_url) else {},
+    **_pool_options(settings.database_url)
+)
+
+# Create async engine (request handlers)
+_async_url = settings.async_database_url or async_database_url(settings.database_url)
+async_engine = create_async_engine(
+    _async_url,
+    echo=False,
+    **_pool_options(_async_url)
+)
+
+if _is_sqlite(settings.database_url):
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+if _is_sqlite(_async_url):
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+async_session_factory = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
 )
 
+def describe_database() -> str:
+    """Summarize the effective pool and SQLite pragma configuration"""
+    pool = async_engine.pool
+    parts = [f"{async_engine.dialect.name}+{async_engine.driver}", f"pool={type(pool).__name__}"]
+    if hasattr(pool, "size") and _pool_options(_async_url):
+        parts.append(
+            f"size={pool.size()} max_overflow={settings.db_max_overflow} "
+            f"pre_ping={settings.db_pool_pre_ping} recycle={settings.db_pool_recycle}s"
+        )
+    if _is_sqlite(settings.database_url):
+        with engine.connect() as conn:
+            effective = {
+                name: conn.execute(text(f"PRAGMA {name}")).scalar()
+                for name in sqlite_pragmas()
+            }
+        parts.append(" ".join(f"{name}={value}" for name, value in effective.items()))
+    return " ".join(parts)
+
+# Indexes earlier versions created that nothing reads any more: (table, index)
+OBSOLETE_INDEXES = [
+    ("toollog", "ix_toollog_tool_request_id"),  # replay lookups moved to IdempotencyRecord
+]
+
 def create_db_and_tables():
     """Create database tables"""
     SQLModel.metadata.create_all(engine)
+    ensure_columns()
+    ensure_indexes()
+    drop_obsolete_indexes()
+
+def ensure_columns():
+    """Add columns missing from tables that predate them (ALTER TABLE ... ADD COLUMN)"""
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        quote = conn.dialect.identifier_preparer.quote
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(conn.dialect)}"
+                # Existing rows take the server default, which NOT NULL columns must have
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    ddl += f" DEFAULT {getattr(default, 'text', default)}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                print(f"🛠️  Added column {table.name}.{column.name}")
+
+def _missing_indexes(conn):
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                yield table, index
+
+def _duplicates(table, index):
+    """Rows a unique index would reject: all but the most recently inserted row of each group"""
+    keep = select(func.max(table.c.id)).group_by(*index.columns)
+    return table.c.id.not_in(keep)
+
+def ensure_indexes():
+    """
+    Create indexes missing from tables that predate them.
+    A unique index is not created while the table holds rows that violate it; the rows
+    are reported instead and can be removed with `python init_db.py --dedupe`.
+    """
+    with engine.begin() as conn:
+        for table, index in list(_missing_indexes(conn)):
+            if index.unique:
+                duplicates = conn.execute(select(func.count()).select_from(table).where(_duplicates(table, index))).scalar()
+                if duplicates:
+                    cleanup = delete(table).where(_duplicates(table, index)).compile(conn, compile_kwargs={"literal_binds": True})
+                    cleanup = " ".join(str(cleanup).split())
+                    print(f"⚠️  Not creating unique index {index.name}: {duplicates} duplicate rows in {table.name}")
+                    print(f"   Review them, then run `python init_db.py --dedupe` or: {cleanup};")
+                    continue
+            index.create(conn)
+
+def drop_obsolete_indexes():
+    """Drop indexes that only cost writes now; no data is touched"""
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        tables = set(inspector.get_table_names())
+        for table, name in OBSOLETE_INDEXES:
+            if table in tables and name in {index["name"] for index in inspector.get_indexes(table)}:
+                conn.execute(text(f"DROP INDEX {conn.dialect.identifier_preparer.quote(name)}"))
+                print(f"🛠️  Dropped unused index {name}")
+
+def dedupe_for_unique_indexes():
+    """One-off migration: delete rows blocking missing unique indexes, keeping the newest of each group"""
+    with engine.begin() as conn:
+        for table, index in list(_missing_indexes(conn)):
+            if not index.unique:
+                continue
+            deleted = conn.execute(delete(table).where(_duplicates(table, index))).rowcount
+            print(f"🧹 Deleted {deleted} duplicate rows from {table.name} for {index.name}")
+    ensure_indexes()
+
+def upsert_rows(
+    session: Session,
+    model: Type[SQLModel],
+    rows: List[Dict[str, Any]],
+    keys: List[str],
+    overwrite: bool = True
+):
+    """
+    Insert rows, resolving conflicts on the unique `keys` with ON CONFLICT.
+    With overwrite, conflicting rows are updated (NULLs never replace stored values);
+    otherwise existing rows are left untouched.
+    """
+    if not rows:
+        return
+    
+    # Collapse duplicates within the batch so one statement never touches a row twice
+    rows = list({tuple(row[key] for key in keys): row for row in rows}.values())
+    
+    table = model.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite.insert(table)
+    elif dialect == "postgresql":
+        stmt = postgresql.insert(table)
+    else:
+        raise NotImplementedError(f"Upsert is not supported for the {dialect} dialect")
+    
+    if overwrite:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={
+                column.name: func.coalesce(stmt.excluded[column.name], column)
+                for column in table.columns
+                if column.name not in keys and not column.primary_key
+            }
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+    
+    session.exec(stmt, params=rows)
 
-def get_session():
-    """Dependency to get database session"""
-    with Session(engine) as session:
+async def get_session():
+    """Dependency to get an async database session"""
+    async with async_session_factory() as session:
         yield session
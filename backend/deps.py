@@ -1,7 +1,13 @@
-from typing import Optional
-from fastapi import Depends, HTTPException, status, Header
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, status, Header, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from config import settings
@@ -9,6 +15,108 @@ from db import get_session
 from models import User
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+DEMO_EMAIL = "demo@example.com"
+
+class UserCache:
+    """Thread-safe in-process TTL/LRU identity cache of resolved users"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def put(self, key: str, user: User):
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None):
+        """Drop every cached entry for a user, or the whole cache"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k, (user, _) in self._entries.items() if user.id == user_id]:
+                del self._entries[key]
+
+user_cache = UserCache(settings.user_cache_max_size, settings.user_cache_ttl_seconds)
+_demo_user_lock = asyncio.Lock()
+
+async def _load_user(session: AsyncSession, identifier: str) -> Optional[User]:
+    if identifier.isdigit():
+        return await session.get(User, int(identifier))
+    if "@" in identifier:
+        return (await session.exec(select(User).where(User.email == identifier))).first()
+    return None
+
+async def _get_or_create_demo_user(session: AsyncSession) -> User:
+    async with _demo_user_lock:
+        user = (await session.exec(select(User).where(User.email == DEMO_EMAIL))).first()
+        if user:
+            return user
+        
+        user = User(
+            email=DEMO_EMAIL,
+            name="Demo User",
+            height_cm=175.0,
+            weight_kg=70.0
+        )
+        session.add(user)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Another process created the demo user first
+            await session.rollback()
+            return (await session.exec(select(User).where(User.email == DEMO_EMAIL))).first()
+        await session.refresh(user)
+        return user
+
+async def resolve_user(
+    session: AsyncSession,
+    identifier: Optional[str] = None,
+    fallback_to_demo: bool = True
+) -> Optional[User]:
+    """
+    Resolve a user id or email to a User through the identity cache.
+    A missing identifier resolves to the demo user. An unknown one resolves to None, or to
+    the demo user with fallback_to_demo; that fallback is not cached under the unknown key.
+    Returned users are detached copies and must not be added to a session.
+    """
+    key = str(identifier).strip() if identifier is not None else ""
+    key = key or DEMO_EMAIL
+    user = user_cache.get(key)
+    if user is not None:
+        return user
+    
+    user = await _load_user(session, key)
+    if user is None:
+        if key == DEMO_EMAIL:
+            user = await _get_or_create_demo_user(session)
+        elif fallback_to_demo:
+            return await resolve_user(session)
+        else:
+            return None
+    
+    user = User(**user.model_dump())
+    user_cache.put(key, user)
+    return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
@@ -31,7 +139,7 @@ def verify_token(token: str) -> Optional[dict]:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ) -> User:
     """Get current user from JWT token"""
     credentials_exception = HTTPException(
@@ -44,16 +152,29 @@ async def get_current_user(
     if payload is None:
         raise credentials_exception
     
-    user_id: int = payload.get("sub")
+    user_id = payload.get("sub")
     if user_id is None:
         raise credentials_exception
     
-    user = session.exec(select(User).where(User.id == user_id)).first()
+    user = await resolve_user(session, user_id, fallback_to_demo=False)
     if user is None:
         raise credentials_exception
     
     return user
 
+async def get_request_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    session: AsyncSession = Depends(get_session)
+) -> User:
+    """Resolve the caller from an optional JWT `sub`, falling back to the demo user"""
+    user_id = None
+    if credentials:
+        payload = verify_token(credentials.credentials)
+        if payload:
+            user_id = payload.get("sub")
+    
+    return await resolve_user(session, user_id)
+
 async def verify_agent_token(
     authorization: Optional[str] = Header(None)
 ) -> bool:
@@ -79,3 +200,27 @@ async def verify_agent_token(
         )
     
     return True
+
+async def get_agent_user(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(verify_agent_token)
+) -> User:
+    """Resolve the user named by an agent tool request's `user_id` (the demo user when omitted); 404 if unknown"""
+    user_id = None
+    if request.method in ("POST", "PUT", "PATCH"):
+        try:
+            # Starlette caches the parsed body, so the handler does not re-read it
+            body = await request.json()
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            user_id = body.get("user_id")
+    
+    user = await resolve_user(session, user_id, fallback_to_demo=False)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User '{user_id}' not found",
+        )
+    return user
@@ -0,0 +1,54 @@
+"""
+App-lifetime httpx client for upstream APIs.
+
+One pooled AsyncClient is shared by every request so connections (and their
+TLS sessions) are kept alive and reused, with HTTP/2 when the h2 package is
+installed. It is created lazily and closed on app shutdown.
+"""
+
+import importlib.util
+from typing import Any, Dict, Optional
+
+import httpx
+from config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+def http2_available() -> bool:
+    return settings.http2_enabled and importlib.util.find_spec("h2") is not None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=http2_available(),
+            timeout=httpx.Timeout(
+                connect=settings.http_connect_timeout,
+                read=settings.http_read_timeout,
+                write=settings.http_write_timeout,
+                pool=settings.http_pool_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+        )
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def describe_http_client() -> Dict[str, Any]:
+    """Effective client settings, for startup logging"""
+    return {
+        "http2": http2_available(),
+        "connect_timeout": settings.http_connect_timeout,
+        "read_timeout": settings.http_read_timeout,
+        "max_connections": settings.http_max_connections,
+        "max_keepalive": settings.http_max_keepalive,
+    }
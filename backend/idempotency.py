@@ -0,0 +1,199 @@
+"""
+Request-id based idempotency for agent write tools.
+
+Agents retry tool calls that time out, so a write tool runs its body at most
+once per (tool, user, request_id): the serialized response is kept in an
+in-memory LRU for `idempotency_ttl` seconds and replays return it without
+re-executing. Concurrent duplicates wait for the in-flight call and share its
+result. With `idempotency_persist` on, the response is also stored in an
+IdempotencyRecord row committed in the same transaction as the write, so replays
+are recognized after a restart or by another worker. The row is unique per
+(tool, user, request_id): when two workers race on the same key, the loser's
+commit fails, its writes are rolled back and it replays the winner's
+response. Reusing a request_id with different arguments is rejected.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from config import settings
+from models import IdempotencyRecord
+from responses import dumps
+from tool_log import ToolAudit
+
+IdempotencyKey = Tuple[str, Optional[int], str]
+
+# Agent correlation ids that don't change what a call does
+CORRELATION_FIELDS = {"session_id", "request_id"}
+
+def fingerprint(args: BaseModel) -> str:
+    data = to_jsonable_python(args.model_dump(exclude=CORRELATION_FIELDS))
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+class IdempotencyCache:
+    def __init__(self, ttl: float, max_size: int, persist: bool):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.persist = persist
+        # key -> (response body, args fingerprint, expiry)
+        self._entries: "OrderedDict[IdempotencyKey, Tuple[bytes, str, float]]" = OrderedDict()
+        self._inflight: Dict[IdempotencyKey, Tuple[asyncio.Future, str]] = {}
+        self._lock = threading.Lock()
+        self.counters = {"executed": 0, "replayed": 0, "persisted_replays": 0, "coalesced": 0, "conflicts": 0}
+
+    def _get(self, key: IdempotencyKey) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, digest, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body, digest
+
+    def _put(self, key: IdempotencyKey, body: bytes, digest: str):
+        with self._lock:
+            self._entries[key] = (body, digest, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _check(self, digest: str, stored: str):
+        if digest != stored:
+            self.counters["conflicts"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="request_id was already used with different arguments"
+            )
+
+    async def _load(self, session: AsyncSession, key: IdempotencyKey) -> Optional[Tuple[bytes, str]]:
+        """Persisted response of an earlier call, if still within the TTL"""
+        tool, user_id, request_id = key
+        row = (await session.exec(
+            select(IdempotencyRecord)
+            .where(IdempotencyRecord.tool == tool)
+            .where(IdempotencyRecord.user_id == user_id)
+            .where(IdempotencyRecord.request_id == request_id)
+        )).first()
+        if row is None:
+            return None
+        if row.created_at < datetime.utcnow() - timedelta(seconds=self.ttl):
+            # Expired: free the key for this call, in the same transaction as its write.
+            # Flushed now because a flush orders inserts before deletes
+            await session.delete(row)
+            await session.flush()
+            return None
+        return dumps(row.response_json), row.fingerprint
+
+    async def run(
+        self,
+        session: AsyncSession,
+        tool: str,
+        user_id: Optional[int],
+        args: BaseModel,
+        audit: ToolAudit,
+        execute: Callable[[], Awaitable[BaseModel]],
+    ) -> Tuple[bytes, bool]:
+        """
+        Run a write tool at most once per request_id and return (response body, replayed).
+        `execute` stages its writes on `session` without committing; the commit happens here,
+        together with the persisted IdempotencyRecord row.
+        """
+        request_id = getattr(args, "request_id", None)
+        if not request_id:
+            response = await execute()
+            await session.commit()
+            audit.record(tool, user_id, args, request_id=request_id)
+            return dumps(response), False
+
+        key = (tool, user_id, request_id)
+        digest = fingerprint(args)
+        cached = self._get(key)
+        if cached is not None:
+            self._check(digest, cached[1])
+            self.counters["replayed"] += 1
+            audit.record(tool, user_id, args, request_id=request_id, replayed=True)
+            return cached[0], True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            future, stored = inflight
+            self._check(digest, stored)
+            self.counters["coalesced"] += 1
+            body = await asyncio.shield(future)
+            audit.record(tool, user_id, args, request_id=request_id, replayed=True)
+            return body, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (future, digest)
+        try:
+            persisted = await self._load(session, key) if self.persist else None
+            if persisted is not None:
+                self._check(digest, persisted[1])
+                body, replayed = persisted[0], True
+                self.counters["persisted_replays"] += 1
+                audit.record(tool, user_id, args, request_id=request_id, replayed=True)
+            else:
+                response = await execute()
+                body, replayed = dumps(response), False
+                if self.persist:
+                    session.add(IdempotencyRecord(
+                        tool=tool, user_id=user_id, request_id=request_id,
+                        fingerprint=digest, response_json=json.loads(body)
+                    ))
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    # Another worker committed the same key first; this call's writes are discarded
+                    await session.rollback()
+                    persisted = await self._load(session, key) if self.persist else None
+                    if persisted is None:
+                        raise
+                    self._check(digest, persisted[1])
+                    body, replayed = persisted[0], True
+                    self.counters["persisted_replays"] += 1
+                    audit.record(tool, user_id, args, request_id=request_id, replayed=True)
+                else:
+                    audit.record(tool, user_id, args, request_id=request_id)
+                    self.counters["executed"] += 1
+            self._put(key, body, digest)
+            future.set_result(body)
+            return body, replayed
+        except BaseException as e:
+            # Waiting duplicates see the same failure; nothing is cached so a later retry runs again
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            **self.counters,
+            "entries": entries,
+            "in_flight": len(self._inflight),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "persist": self.persist,
+        }
+
+idempotency = IdempotencyCache(settings.idempotency_ttl, settings.idempotency_max_size, settings.idempotency_persist)
@@ -0,0 +1,139 @@
+"""
+Streaming CSV ingest for metric samples.
+
+Rows are parsed incrementally with the csv module, validated a batch at a
+time and upserted with Core executemany statements, one transaction per
+batch, so memory stays flat regardless of upload size. Re-importing a day
+updates the existing sample instead of duplicating it, and the readiness
+snapshots covering the imported days are recomputed once at the end.
+"""
+
+import codecs
+import csv
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from sqlmodel import Session
+from config import settings
+from db import upsert_rows
+from models import MetricSample
+from readiness_engine import refresh_after_ingest
+from timeline_cache import timeline_cache
+
+# CSV column order: date, sleep, stress, steps, cardio, active, dist, cal
+METRIC_COLUMNS = [
+    ("sleep_h", float),
+    ("stress", int),
+    ("steps", int),
+    ("cardio", int),
+    ("active_min", int),
+    ("distance_km", float),
+    ("calories", int),
+]
+
+def parse_metric_row(row: List[str], user_id: int) -> Optional[Dict[str, Any]]:
+    """Validate one CSV row and return insert parameters, or None if invalid"""
+    if len(row) < len(METRIC_COLUMNS) + 1:
+        return None
+    try:
+        values: Dict[str, Any] = {
+            "user_id": user_id,
+            "date": date.fromisoformat(row[0].strip()),
+        }
+        for (column, cast), raw in zip(METRIC_COLUMNS, row[1:]):
+            raw = raw.strip()
+            values[column] = cast(raw) if raw else None
+    except ValueError:
+        return None
+    return values
+
+def detect_period(rows: int) -> str:
+    """Guess the timeline period covered by an import"""
+    return "week" if rows <= 7 else "month"
+
+async def iter_text_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[str]]:
+    """Decode a byte stream and yield the complete lines of each chunk"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        if lines:
+            yield lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield [pending]
+
+@dataclass
+class ImportStats:
+    rows: int
+    skipped: int
+    elapsed_s: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s > 0 else float(self.rows)
+
+class MetricImporter:
+    """
+    Incremental CSV importer that bulk-upserts metric rows in fixed-size batches.
+    Methods take a sync Session so async callers can drive them with AsyncSession.run_sync.
+    """
+
+    def __init__(self, user_id: int, batch_size: Optional[int] = None):
+        self.user_id = user_id
+        self.batch_size = batch_size or settings.metrics_import_batch_size
+        self.rows = 0
+        self.skipped = 0
+        self._batch: List[Dict[str, Any]] = []
+        self._header_seen = False
+        self._first_date: Optional[date] = None
+        self._last_date: Optional[date] = None
+        self._started = time.perf_counter()
+
+    def feed(self, session: Session, lines: Iterable[str]):
+        """Parse a run of CSV lines, flushing every full batch"""
+        for row in csv.reader(lines):
+            if not self._header_seen:
+                # First row is always the header
+                self._header_seen = True
+                continue
+            if not any(cell.strip() for cell in row):
+                continue
+            values = parse_metric_row(row, self.user_id)
+            if values is None:
+                self.skipped += 1
+                continue
+            self._batch.append(values)
+            if len(self._batch) >= self.batch_size:
+                self._flush(session)
+
+    def finish(self, session: Session) -> ImportStats:
+        """Flush the trailing partial batch, refresh readiness and return import statistics"""
+        self._flush(session)
+        if self._first_date is not None:
+            refresh_after_ingest(session, self.user_id, self._first_date, self._last_date)
+            session.commit()
+        return ImportStats(
+            rows=self.rows,
+            skipped=self.skipped,
+            elapsed_s=time.perf_counter() - self._started,
+        )
+
+    def _flush(self, session: Session):
+        if not self._batch:
+            return
+        upsert_rows(session, MetricSample, self._batch, ["user_id", "date"])
+        session.commit()
+        timeline_cache.invalidate(self.user_id)
+        self.rows += len(self._batch)
+        dates = [row["date"] for row in self._batch]
+        if self._first_date is None:
+            self._first_date, self._last_date = min(dates), max(dates)
+        else:
+            self._first_date = min(self._first_date, *dates)
+            self._last_date = max(self._last_date, *dates)
+        self._batch = []
@@ -1,4 +1,5 @@
-from db import create_db_and_tables
+import sys
+from db import create_db_and_tables, dedupe_for_unique_indexes
 from models import User, MetricSample, Goal, DiaryEntry, WorkoutPlan, ReadinessSnapshot, ToolLog
 
 def init_database():
@@ -9,3 +10,5 @@ def init_database():
 
 if __name__ == "__main__":
     init_database()
+    if "--dedupe" in sys.argv:
+        dedupe_for_unique_indexes()
@@ -0,0 +1,120 @@
+"""
+Minimal RFC 6902 JSON Patch.
+
+Supports the add, remove, replace, move, copy and test operations on plain
+dict/list documents. As an extension, a path segment that addresses a list
+of objects may also name an element by its "day" value (case-insensitive),
+so agents can write `/plan/Monday/volume` instead of looking up indexes.
+"""
+
+import copy
+from typing import Any, Dict, List, Tuple
+
+class PatchError(ValueError):
+    """Malformed operation or a path that doesn't exist"""
+
+class PatchTestFailed(PatchError):
+    """A `test` operation did not match the document"""
+
+KEY_FIELD = "day"
+
+def _segments(path: str) -> List[str]:
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise PatchError(f"Invalid path '{path}'")
+    return [part.replace("~1", "/").replace("~0", "~") for part in path[1:].split("/")]
+
+def _list_index(container: list, segment: str, allow_end: bool) -> int:
+    if segment == "-" and allow_end:
+        return len(container)
+    if segment.isdigit():
+        index = int(segment)
+        if index < len(container) + (1 if allow_end else 0):
+            return index
+        raise PatchError(f"Index {index} out of range")
+    for index, item in enumerate(container):
+        if isinstance(item, dict) and str(item.get(KEY_FIELD, "")).lower() == segment.lower():
+            return index
+    raise PatchError(f"No element '{segment}'")
+
+def _child(node: Any, segment: str) -> Any:
+    if isinstance(node, dict):
+        if segment not in node:
+            raise PatchError(f"No member '{segment}'")
+        return node[segment]
+    if isinstance(node, list):
+        return node[_list_index(node, segment, allow_end=False)]
+    raise PatchError(f"Cannot descend into {type(node).__name__} at '{segment}'")
+
+def _resolve(doc: Any, path: str) -> Tuple[Any, str]:
+    """Parent container of the path's target and the final segment"""
+    segments = _segments(path)
+    if not segments:
+        raise PatchError("Operations on the document root are not supported")
+    node = doc
+    for segment in segments[:-1]:
+        node = _child(node, segment)
+    return node, segments[-1]
+
+def _get(doc: Any, path: str) -> Any:
+    node = doc
+    for segment in _segments(path):
+        node = _child(node, segment)
+    return node
+
+def _add(doc: Any, path: str, value: Any):
+    parent, key = _resolve(doc, path)
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, key, allow_end=True), value)
+    else:
+        raise PatchError(f"Cannot add to {type(parent).__name__}")
+
+def _remove(doc: Any, path: str) -> Any:
+    parent, key = _resolve(doc, path)
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise PatchError(f"No member '{key}'")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_list_index(parent, key, allow_end=False))
+    raise PatchError(f"Cannot remove from {type(parent).__name__}")
+
+def _replace(doc: Any, path: str, value: Any):
+    parent, key = _resolve(doc, path)
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise PatchError(f"No member '{key}'")
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent[_list_index(parent, key, allow_end=False)] = value
+    else:
+        raise PatchError(f"Cannot replace in {type(parent).__name__}")
+
+def apply_patch(doc: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply operations to a copy of doc; the original is never modified"""
+    doc = copy.deepcopy(doc)
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or not isinstance(operation.get("path"), str):
+            raise PatchError(f"Invalid operation {operation!r}")
+        op, path = operation["op"], operation["path"]
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"'{op}' requires a value")
+        if op == "add":
+            _add(doc, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(doc, path)
+        elif op == "replace":
+            _replace(doc, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            _add(doc, path, _remove(doc, operation.get("from", "")))
+        elif op == "copy":
+            _add(doc, path, copy.deepcopy(_get(doc, operation.get("from", ""))))
+        elif op == "test":
+            if _get(doc, path) != operation["value"]:
+                raise PatchTestFailed(f"Test failed at '{path}'")
+        else:
+            raise PatchError(f"Unsupported op '{op}'")
+    return doc
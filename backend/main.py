@@ -1,20 +1,30 @@
-from fastapi import FastAPI, Depends
+import asyncio
+from fastapi import FastAPI, Depends, Request
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 from datetime import datetime, timedelta
 from voice import router as voice_router
-from voice_asr import router as asr_router
+from voice_asr import router as asr_router, asr_pool
 from readiness import router as readiness_router
 from routers.api import me, readiness as api_readiness, metrics, goals, diary
-from routers.tools import get_readiness_score, get_current_metrics
+from routers.tools import get_readiness_score, get_current_metrics, batch as tool_batch, audit as tool_audit, log_workout_session, get_workout_history, get_workout_plan, update_workout_plan, analyze_pose
 from deps import create_access_token, get_current_user
-from db import create_db_and_tables
+from db import create_db_and_tables, async_engine, describe_database
+from http_client import close_http_client, describe_http_client
+from tts_warmup import warm_tts_cache
+from tts_cache import tts_cache
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from tool_log import audit_failed_request, tool_log
 from config import settings
+from responses import FastJSONResponse, orjson_available
 
 app = FastAPI(
     title="AI Sports Coach Backend",
     description="Full-stack fitness coaching platform with AI agent tools",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 # CORS middleware
@@ -26,12 +36,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tool calls rejected before their handler runs are audited here
+@app.exception_handler(StarletteHTTPException)
+async def audited_http_exception(request: Request, exc: StarletteHTTPException):
+    audit_failed_request(request, exc)
+    return await http_exception_handler(request, exc)
+
+@app.exception_handler(RequestValidationError)
+async def audited_validation_error(request: Request, exc: RequestValidationError):
+    audit_failed_request(request, exc)
+    return await request_validation_exception_handler(request, exc)
+
 # Create database tables on startup
 @app.on_event("startup")
 async def startup_event():
     print("🚀 Starting AI Sports Coach Backend...")
     create_db_and_tables()
     print("✅ Database tables created")
+    print(f"🗄️  Database config: {describe_database()}")
+    print(f"🌐 Upstream HTTP client: {describe_http_client()}")
+    print(f"🧾 JSON encoder: {'orjson' if orjson_available() else 'pydantic-core'}")
     
     # Run startup script for seeding
     try:
@@ -41,8 +65,35 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️  Warning: Could not seed database: {e}")
     
+    # Background writer for the agent tool audit log
+    if tool_log is not None:
+        await tool_log.start()
+    
+    # Pre-open upstream ASR connections in the background
+    await asr_pool.start()
+    
+    # Index TTS clips cached on disk by earlier runs
+    if tts_cache is not None:
+        await tts_cache.open()
+    
+    # Pre-synthesize canned phrases without delaying readiness
+    if settings.tts_warmup_enabled:
+        app.state.tts_warmup_task = asyncio.create_task(warm_tts_cache())
+    
     print("🎉 Backend ready to serve requests!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    warmup = getattr(app.state, "tts_warmup_task", None)
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+    await asr_pool.stop()
+    await close_http_client()
+    # Flush queued audit entries while the database is still available
+    if tool_log is not None:
+        await tool_log.stop()
+    await async_engine.dispose()
+
 @app.get("/") 
 def root():
     return {"ok": True, "service": "ai-sports-coach-backend"}
@@ -53,7 +104,7 @@ def dev_login():
     """Development endpoint to get a JWT token for testing"""
     # Create a demo user token
     access_token = create_access_token(
-        data={"sub": 1, "email": "demo@example.com"}
+        data={"sub": "1", "email": "demo@example.com"}
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -74,3 +125,10 @@ app.include_router(readiness_router, prefix="/api/readiness", tags=["Readiness"]
 # Mount tool routes (agent token protected)
 app.include_router(get_readiness_score.router, prefix="/tools", tags=["Agent Tools"])
 app.include_router(get_current_metrics.router, prefix="/tools", tags=["Agent Tools"])
+app.include_router(get_workout_history.router, prefix="/tools", tags=["Agent Tools"])
+app.include_router(get_workout_plan.router, prefix="/tools", tags=["Agent Tools"])
+app.include_router(update_workout_plan.router, prefix="/tools", tags=["Agent Tools"])
+app.include_router(log_workout_session.router, prefix="/tools", tags=["Agent Tools"])
+app.include_router(analyze_pose.router, prefix="/tools", tags=["Agent Tools"])
+app.include_router(tool_batch.router, prefix="/tools", tags=["Agent Tools"])
+app.include_router(tool_audit.router, prefix="/tools", tags=["Agent Tools"])
@@ -1,6 +1,6 @@
 from datetime import datetime, date
 from typing import Optional, List, Dict, Any
-from sqlmodel import SQLModel, Field, JSON, Column
+from sqlmodel import SQLModel, Field, JSON, Column, Index
 from pydantic import Json
 
 class User(SQLModel, table=True):
@@ -12,6 +12,10 @@ class User(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class MetricSample(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_metricsample_user_id_date", "user_id", "date", unique=True),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     date: date
@@ -24,6 +28,10 @@ class MetricSample(SQLModel, table=True):
     calories: Optional[int] = None
 
 class ReadinessSnapshot(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_readinesssnapshot_user_id_date", "user_id", "date", unique=True),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     date: date
@@ -33,12 +41,22 @@ class ReadinessSnapshot(SQLModel, table=True):
     recommendation: str
 
 class WorkoutPlan(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_workoutplan_user_id_week_start", "user_id", "week_start", unique=True),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     week_start: date
     plan_json: Dict[str, Any] = Field(sa_column=Column(JSON))
+    # Bumped on every update; writes are conditional on the version they read
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1"})
 
 class WorkoutSession(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_workoutsession_user_id_date", "user_id", "date"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     date: date
@@ -68,3 +86,17 @@ class ToolLog(SQLModel, table=True):
     request_id: Optional[str] = None
     payload_json: Dict[str, Any] = Field(sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class IdempotencyRecord(SQLModel, table=True):
+    __table_args__ = (
+        # One execution per (tool, user, request_id), enforced across workers
+        Index("ix_idempotencyrecord_tool_user_id_request_id", "tool", "user_id", "request_id", unique=True),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    tool: str
+    user_id: int = Field(foreign_key="user.id")
+    request_id: str
+    fingerprint: str
+    response_json: Any = Field(sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
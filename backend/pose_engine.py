@@ -0,0 +1,278 @@
+"""
+Vectorized pose analysis.
+
+A keypoint sequence is packed into one (frames, joints, 3) float array of
+x, y and confidence score. Joint angles, trunk lean, left/right symmetry and
+range of motion are then computed for every frame at once with NumPy;
+keypoints below the confidence threshold become NaN and are ignored by the
+NaN-aware reductions. Image coordinates are assumed (y grows downwards), in
+pixels or normalized, since angles don't depend on scale.
+"""
+
+import warnings
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+JOINTS = [
+    "left_shoulder", "right_shoulder", "left_elbow", "right_elbow", "left_wrist", "right_wrist",
+    "left_hip", "right_hip", "left_knee", "right_knee", "left_ankle", "right_ankle",
+]
+JOINT_INDEX = {name: index for index, name in enumerate(JOINTS)}
+
+# Angle measured at the middle joint of each triple
+ANGLES = {
+    "left_elbow": ("left_shoulder", "left_elbow", "left_wrist"),
+    "right_elbow": ("right_shoulder", "right_elbow", "right_wrist"),
+    "left_shoulder": ("left_elbow", "left_shoulder", "left_hip"),
+    "right_shoulder": ("right_elbow", "right_shoulder", "right_hip"),
+    "left_hip": ("left_shoulder", "left_hip", "left_knee"),
+    "right_hip": ("right_shoulder", "right_hip", "right_knee"),
+    "left_knee": ("left_hip", "left_knee", "left_ankle"),
+    "right_knee": ("right_hip", "right_knee", "right_ankle"),
+}
+ANGLE_NAMES = list(ANGLES)
+ANGLE_INDEX = {name: index for index, name in enumerate(ANGLE_NAMES)}
+_A, _B, _C = (np.array([JOINT_INDEX[triple[k]] for triple in ANGLES.values()]) for k in range(3))
+
+SYMMETRY_PAIRS = ["shoulder", "elbow", "hip", "knee"]
+_LEFT = np.array([ANGLE_INDEX[f"left_{joint}"] for joint in SYMMETRY_PAIRS])
+_RIGHT = np.array([ANGLE_INDEX[f"right_{joint}"] for joint in SYMMETRY_PAIRS])
+
+# Knees closer together than this fraction of the ankle width at the bottom of a rep
+VALGUS_RATIO = 0.8
+# Only trust the valgus ratio when the feet are visibly apart (a roughly frontal view)
+MIN_ANKLE_WIDTH_TORSO_RATIO = 0.25
+# Frames within this many degrees of the deepest point count as the bottom of the movement
+BOTTOM_MARGIN = 10.0
+MIN_VALID_FRACTION = 0.5
+
+class PoseInputError(ValueError):
+    """Keypoints that can't be read as a pose sequence"""
+
+@dataclass(frozen=True)
+class ExerciseProfile:
+    """Range-of-motion targets for one exercise (angles in degrees)"""
+    depth_joints: Tuple[str, ...]
+    depth_angle: float  # the depth joints must close to at most this
+    depth_cue: str
+    lockout_angle: Optional[float] = None  # ...and open back to at least this
+    lockout_cue: str = ""
+    bilateral: bool = True  # both sides should move together
+    max_trunk_lean: Optional[float] = None
+    min_hip_angle: Optional[float] = None  # straight body line (shoulder-hip-knee)
+    check_valgus: bool = False
+
+EXERCISES: Dict[str, ExerciseProfile] = {
+    "squat": ExerciseProfile(
+        depth_joints=("left_knee", "right_knee"),
+        depth_angle=100,
+        depth_cue="Sit deeper - aim for your thighs to reach parallel",
+        lockout_angle=160,
+        lockout_cue="Stand all the way up and squeeze your glutes at the top",
+        max_trunk_lean=50,
+        check_valgus=True,
+    ),
+    "lunge": ExerciseProfile(
+        depth_joints=("left_knee", "right_knee"),
+        depth_angle=105,
+        depth_cue="Lower your back knee closer to the floor",
+        bilateral=False,
+        max_trunk_lean=25,
+    ),
+    "push_up": ExerciseProfile(
+        depth_joints=("left_elbow", "right_elbow"),
+        depth_angle=100,
+        depth_cue="Lower your chest closer to the floor",
+        lockout_angle=155,
+        lockout_cue="Fully straighten your arms at the top",
+        min_hip_angle=155,
+    ),
+}
+EXERCISE_ALIASES = {"squats": "squat", "lunges": "lunge", "pushup": "push_up", "push-up": "push_up", "pushups": "push_up"}
+
+GENERAL_CUES = {
+    "low_keypoint_confidence": "Step back so your whole body stays in frame",
+    "forward_lean": "Keep your chest up and brace your core",
+    "knee_valgus": "Push your knees out in line with your toes",
+    "hip_sag": "Squeeze your glutes and keep a straight line from shoulders to heels",
+}
+ASYMMETRY_CUE = "Move both sides evenly - your {joint}s are working unevenly"
+
+@dataclass
+class PoseAnalysis:
+    frames: int
+    exercise: Optional[str]
+    valid_fraction: float
+    joint_ranges: Dict[str, Dict[str, Optional[float]]]
+    asymmetry: Dict[str, Optional[float]]
+    flags: List[str] = field(default_factory=list)
+    cues: List[str] = field(default_factory=list)
+
+def exercise_profile(name: Optional[str]) -> Optional[ExerciseProfile]:
+    if not name:
+        return None
+    key = name.strip().lower().replace(" ", "_")
+    return EXERCISES.get(EXERCISE_ALIASES.get(key, key))
+
+def _point(value: Any) -> Tuple[float, float, float]:
+    if isinstance(value, dict):
+        score = value.get("score", value.get("visibility", value.get("confidence", 1.0)))
+        return float(value["x"]), float(value["y"]), float(1.0 if score is None else score)
+    if len(value) == 2:
+        return float(value[0]), float(value[1]), 1.0
+    return float(value[0]), float(value[1]), float(value[2])
+
+def _frame_points(frame: Any) -> Dict[str, Any]:
+    """Joint name -> point for one frame, from a name-keyed map or a list of named points"""
+    if isinstance(frame, dict):
+        return frame
+    return {point["name"]: point for point in frame}
+
+def pack_keypoints(keypoints: List[Dict[str, Any]], max_frames: int) -> np.ndarray:
+    """
+    Pack request keypoints into a (frames, joints, 3) array; missing joints get score 0.
+    Accepts a sequence of frames (`{"keypoints": {...} | [...]}` or a bare joint map each)
+    or a single frame given as a list of named points (`{"name", "x", "y", "score"}`).
+    """
+    if not keypoints:
+        raise PoseInputError("keypoints is empty")
+    if "name" in keypoints[0]:
+        frames: List[Any] = [keypoints]
+    else:
+        frames = [item.get("keypoints", item) for item in keypoints]
+    if len(frames) > max_frames:
+        raise PoseInputError(f"Too many frames ({len(frames)}), at most {max_frames} per call")
+
+    # Filled as one flat list and converted once; per-row NumPy assignment is slower
+    width = len(JOINTS) * 3
+    flat = [0.0] * (len(frames) * width)
+    try:
+        for f, frame in enumerate(frames):
+            base = f * width
+            for name, value in _frame_points(frame).items():
+                j = JOINT_INDEX.get(name)
+                if j is not None and value is not None:
+                    k = base + j * 3
+                    flat[k:k + 3] = _point(value)
+    except (KeyError, IndexError, TypeError, ValueError) as exc:
+        raise PoseInputError(f"Invalid keypoint in frame {f}: {exc!r}")
+    return np.array(flat, dtype=np.float64).reshape(len(frames), len(JOINTS), 3)
+
+def joint_angles(points: np.ndarray, min_score: float) -> np.ndarray:
+    """(frames, angles) in degrees, NaN where any of the three keypoints is below min_score"""
+    xy = points[..., :2]
+    visible = points[..., 2] >= min_score
+    v1 = xy[:, _A] - xy[:, _B]
+    v2 = xy[:, _C] - xy[:, _B]
+    norms = np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cosine = np.einsum("fkd,fkd->fk", v1, v2) / norms
+    angles = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+    valid = visible[:, _A] & visible[:, _B] & visible[:, _C] & (norms > 0)
+    angles[~valid] = np.nan
+    return angles
+
+def _rounded(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 1)
+
+def _quietly(fn, *args, **kwargs):
+    """Call a NumPy nan-reduction; all-NaN slices (joints never seen) just give NaN"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return fn(*args, **kwargs)
+
+def _midpoints(points: np.ndarray, left: str, right: str, min_score: float) -> np.ndarray:
+    pair = points[:, [JOINT_INDEX[left], JOINT_INDEX[right]]]
+    xy = pair[..., :2].copy()
+    xy[pair[..., 2] < min_score] = np.nan
+    return _quietly(np.nanmean, xy, axis=1)  # one visible side is enough (side views)
+
+def trunk_lean(points: np.ndarray, min_score: float) -> np.ndarray:
+    """Per-frame angle of the hip-to-shoulder line from vertical, in degrees"""
+    torso = _midpoints(points, "left_shoulder", "right_shoulder", min_score) \
+        - _midpoints(points, "left_hip", "right_hip", min_score)
+    return np.degrees(np.arctan2(np.abs(torso[:, 0]), -torso[:, 1]))
+
+def knee_ankle_ratio(points: np.ndarray, min_score: float) -> np.ndarray:
+    """Per-frame knee width over ankle width; NaN unless the view is frontal enough to judge"""
+    def width(left: str, right: str) -> np.ndarray:
+        l, r = points[:, JOINT_INDEX[left]], points[:, JOINT_INDEX[right]]
+        w = np.abs(l[:, 0] - r[:, 0])
+        w[(l[:, 2] < min_score) | (r[:, 2] < min_score)] = np.nan
+        return w
+
+    knees, ankles = width("left_knee", "right_knee"), width("left_ankle", "right_ankle")
+    torso = np.abs(points[:, JOINT_INDEX["left_shoulder"], 1] - points[:, JOINT_INDEX["left_hip"], 1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = knees / ankles
+    ratio[~(ankles >= MIN_ANKLE_WIDTH_TORSO_RATIO * torso)] = np.nan
+    return ratio
+
+def analyze(points: np.ndarray, exercise: Optional[str], min_score: float, asymmetry_threshold: float) -> PoseAnalysis:
+    """Score a packed keypoint sequence: ranges of motion, symmetry, and flags with coaching cues"""
+    profile = exercise_profile(exercise)
+    angles = joint_angles(points, min_score)
+    minimum = _quietly(np.nanmin, angles, axis=0)
+    maximum = _quietly(np.nanmax, angles, axis=0)
+    asymmetry = _quietly(np.nanmedian, np.abs(angles[:, _LEFT] - angles[:, _RIGHT]), axis=0)
+
+    flags: List[str] = []
+    cues: List[str] = []
+
+    def flag(name: str, cue: str):
+        flags.append(name)
+        cues.append(cue)
+
+    if profile is not None:
+        depth = angles[:, [ANGLE_INDEX[j] for j in profile.depth_joints]]
+        # Bilateral lifts follow the average of both sides, unilateral ones the working (more bent) side
+        primary = _quietly(np.nanmean if profile.bilateral else np.nanmin, depth, axis=1)
+        valid_fraction = float(np.mean(~np.isnan(primary)))
+    else:
+        valid_fraction = float(np.mean(~np.isnan(angles).all(axis=1)))
+
+    if valid_fraction < MIN_VALID_FRACTION:
+        flag("low_keypoint_confidence", GENERAL_CUES["low_keypoint_confidence"])
+
+    if profile is not None and valid_fraction > 0:
+        deepest = float(np.nanmin(primary))
+        # Range of motion needs a movement; a single frame only gets the posture checks
+        if len(points) > 1:
+            if deepest > profile.depth_angle:
+                flag("shallow_depth", profile.depth_cue)
+            if profile.lockout_angle is not None and float(np.nanmax(primary)) < profile.lockout_angle:
+                flag("incomplete_lockout", profile.lockout_cue)
+
+        bottom = primary <= deepest + BOTTOM_MARGIN
+        if profile.max_trunk_lean is not None:
+            lean = trunk_lean(points, min_score)[bottom]
+            if np.any(lean > profile.max_trunk_lean):
+                flag("forward_lean", GENERAL_CUES["forward_lean"])
+        if profile.min_hip_angle is not None:
+            hips = angles[:, [ANGLE_INDEX["left_hip"], ANGLE_INDEX["right_hip"]]]
+            if np.any(hips < profile.min_hip_angle):
+                flag("hip_sag", GENERAL_CUES["hip_sag"])
+        if profile.check_valgus:
+            ratio = knee_ankle_ratio(points, min_score)[bottom]
+            if np.any(ratio < VALGUS_RATIO):
+                flag("knee_valgus", GENERAL_CUES["knee_valgus"])
+
+    if profile is None or profile.bilateral:
+        for joint, difference in zip(SYMMETRY_PAIRS, asymmetry):
+            if difference > asymmetry_threshold:
+                flag(f"asymmetric_{joint}", ASYMMETRY_CUE.format(joint=joint))
+
+    return PoseAnalysis(
+        frames=len(points),
+        exercise=None if profile is None else next(name for name, p in EXERCISES.items() if p is profile),
+        valid_fraction=round(valid_fraction, 3),
+        joint_ranges={
+            name: {"min": _rounded(lo), "max": _rounded(hi), "range": _rounded(hi - lo)}
+            for name, lo, hi in zip(ANGLE_NAMES, minimum, maximum)
+        },
+        asymmetry={joint: _rounded(value) for joint, value in zip(SYMMETRY_PAIRS, asymmetry)},
+        flags=flags,
+        cues=cues,
+    )
@@ -0,0 +1,224 @@
+"""
+Readiness engine shared by the frontend API and agent tools.
+
+A day is scored from the latest sample in its window, adjusted by the
+personal baselines, z-scores and acute:chronic load from analytics.py.
+
+Snapshots are materialized in ReadinessSnapshot whenever metrics are ingested
+and recomputed when late data lands inside their window or the baseline
+lookback behind it, so the request hot path is a single indexed read on
+(user_id, date). Days without data get a
+no-data marker snapshot (status "unknown"), so they are only scored once
+instead of on every request; ingest replaces the marker with a real score.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, delete, select
+from analytics import CHRONIC_DAYS, HistoryCache, MetricHistory, TrendSummary, analyze, load_history
+from db import upsert_rows
+from models import ReadinessSnapshot
+
+# A day's readiness is derived from the latest sample in this many days
+WINDOW_DAYS = 7
+
+RECOMMENDATIONS = {
+    "high": "You're well recovered. Ready for high-intensity training.",
+    "moderate": "You're moderately recovered. A steady training session is fine, but avoid max-intensity efforts.",
+    "low": "You need recovery. Focus on light activity or rest today.",
+    "unknown": "No recent data. Consider logging your metrics for better insights.",
+}
+
+FATIGUE_BY_STATUS = {"high": "low", "moderate": "moderate", "low": "high"}
+
+@dataclass
+class ReadinessResult:
+    score: int
+    status: str
+    recommendation: str
+    factors: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def fatigue(self) -> str:
+        return FATIGUE_BY_STATUS.get(self.status, "moderate")
+
+    def factor_value(self, name: str, default: Any = None) -> Any:
+        factor = self.factors.get(name)
+        if isinstance(factor, dict):
+            return factor.get("value", default)
+        return factor if factor is not None else default
+
+    @classmethod
+    def from_snapshot(cls, snapshot: ReadinessSnapshot) -> "ReadinessResult":
+        return cls(
+            score=snapshot.score,
+            status=snapshot.status,
+            recommendation=snapshot.recommendation,
+            factors=snapshot.factors_json or {},
+        )
+
+NO_DATA = ReadinessResult(score=50, status="unknown", recommendation=RECOMMENDATIONS["unknown"])
+
+def _impact(value: float, positive_above: float, negative_below: float) -> str:
+    if value > positive_above:
+        return "positive"
+    if value < negative_below:
+        return "negative"
+    return "neutral"
+
+def score_sample(sample: Any, trends: Optional[TrendSummary] = None) -> ReadinessResult:
+    """Score readiness from a day's metrics (MetricSample or DayMetrics), optionally adjusted by trends"""
+    sleep_score = int(sample.sleep_h * 10) if sample.sleep_h else 75
+    stress = sample.stress if sample.stress is not None else 30
+    steps = sample.steps if sample.steps is not None else 8000
+
+    stress_score = 100 - stress  # Lower stress = higher score
+    activity_score = min(100, steps // 100)  # 10k steps = 100 score
+    score = (sleep_score + stress_score + activity_score) // 3
+
+    hr_rest = stress  # Stress is used as a proxy for resting heart rate
+    hrv = 70 + (sleep_score - 75) // 2  # Simple HRV estimate from sleep
+
+    factors = {
+        "Sleep Quality": {"value": sleep_score, "unit": "score", "impact": _impact(sleep_score, 80, 70)},
+        "Resting Heart Rate": {"value": hr_rest, "unit": "bpm",
+                               "impact": "positive" if hr_rest < 60 else "neutral" if hr_rest < 70 else "negative"},
+        "HRV": {"value": hrv, "unit": "ms", "impact": _impact(hrv, 75, 65)},
+        "Activity": {"value": steps, "unit": "steps",
+                     "impact": "positive" if steps >= 10000 else "neutral" if steps >= 6000 else "negative"},
+    }
+
+    if trends is not None:
+        sleep_z = trends.zscore.get("sleep_h")
+        if sleep_z is not None:
+            factors["Sleep vs Baseline"] = {"value": round(sleep_z, 2), "unit": "z",
+                                            "impact": _impact(sleep_z, 0.5, -0.5)}
+            if sleep_z <= -1:
+                score -= 5
+            elif sleep_z >= 1:
+                score += 3
+        stress_z = trends.zscore.get("stress")
+        if stress_z is not None and stress_z >= 1:
+            score -= 5
+        if trends.acwr is not None:
+            # Acute:chronic workload ratio; 0.8-1.3 is the usual sweet spot
+            acwr = trends.acwr
+            factors["Training Load"] = {"value": round(acwr, 2), "unit": "ACWR",
+                                        "impact": "negative" if acwr > 1.5 else "positive" if 0.8 <= acwr <= 1.3 else "neutral"}
+            if acwr > 1.5:
+                score -= 10
+        score = max(0, min(100, score))
+
+    if score >= 80:
+        status = "high"
+    elif score >= 60:
+        status = "moderate"
+    else:
+        status = "low"
+
+    return ReadinessResult(
+        score=score,
+        status=status,
+        recommendation=RECOMMENDATIONS[status],
+        factors=factors,
+    )
+
+def history_range(day: date) -> Tuple[date, date]:
+    """Metric history needed to score a day: its window plus the 28-day baseline"""
+    return day - timedelta(days=CHRONIC_DAYS + WINDOW_DAYS), day
+
+def score_history(history: MetricHistory, start: date, end: date) -> Tuple[Dict[date, ReadinessResult], List[date]]:
+    """
+    Score every day in [start, end] from a history that includes the baseline lookback.
+    Returns the scored days and the days with no sample in their window.
+    """
+    analysis = analyze(history)
+
+    results: Dict[date, ReadinessResult] = {}
+    empty_days: List[date] = []
+    day = start
+    while day <= end:
+        index = history.latest_index(day, WINDOW_DAYS)
+        if index is not None:
+            results[day] = score_sample(history.row(index), analysis.summary(index))
+        else:
+            empty_days.append(day)
+        day += timedelta(days=1)
+    return results, empty_days
+
+def snapshot_rows(user_id: int, results: Dict[date, ReadinessResult]) -> List[Dict[str, Any]]:
+    """ReadinessSnapshot insert parameters for scored days"""
+    return [
+        {
+            "user_id": user_id,
+            "date": day,
+            "score": result.score,
+            "status": result.status,
+            "factors_json": result.factors,
+            "recommendation": result.recommendation,
+        }
+        for day, result in results.items()
+    ]
+
+def store_snapshots(session: Session, user_id: int, rows: List[Dict[str, Any]], empty_days: List[date]):
+    """Upsert scored snapshots, and no-data markers for days without data in their window. Does not commit."""
+    markers = snapshot_rows(user_id, {day: NO_DATA for day in empty_days})
+    upsert_rows(session, ReadinessSnapshot, rows + markers, ["user_id", "date"])
+
+def refresh_snapshots(
+    session: Session,
+    user_id: int,
+    start: date,
+    end: date,
+    histories: Optional[HistoryCache] = None
+) -> Dict[date, ReadinessResult]:
+    """
+    Recompute and persist snapshots for every day in [start, end].
+    Days without any sample in their window get a no-data marker. Does not commit.
+    """
+    lo, hi = history_range(start)[0], end
+    if histories is not None:
+        history = histories.load(session, user_id, lo, hi)
+    else:
+        history = load_history(session, user_id, lo, hi)
+
+    results, empty_days = score_history(history, start, end)
+    store_snapshots(session, user_id, snapshot_rows(user_id, results), empty_days)
+    return results
+
+def refresh_after_ingest(session: Session, user_id: int, first: date, last: date):
+    """Recompute the snapshots that read newly ingested days. Does not commit."""
+    # Data for a day feeds the snapshots of the following CHRONIC_DAYS + WINDOW_DAYS days:
+    # as their window's latest sample, or through the baselines and training load behind it
+    end = last + timedelta(days=CHRONIC_DAYS + WINDOW_DAYS)
+    current = min(end, max(last, date.today()))
+    refresh_snapshots(session, user_id, first, current)
+    if current < end:
+        # Snapshots already stored for later (future) days are dropped and rescored on their next read
+        session.exec(
+            delete(ReadinessSnapshot)
+            .where(ReadinessSnapshot.user_id == user_id)
+            .where(ReadinessSnapshot.date > current)
+            .where(ReadinessSnapshot.date <= end)
+        )
+
+def get_readiness(
+    session: Session,
+    user_id: int,
+    day: date,
+    histories: Optional[HistoryCache] = None
+) -> ReadinessResult:
+    """Return the readiness for a day, materializing its snapshot on first access"""
+    snapshot = session.exec(
+        select(ReadinessSnapshot)
+        .where(ReadinessSnapshot.user_id == user_id)
+        .where(ReadinessSnapshot.date == day)
+    ).first()
+    if snapshot:
+        return ReadinessResult.from_snapshot(snapshot)
+
+    results = refresh_snapshots(session, user_id, day, day, histories)
+    session.commit()
+    return results.get(day, NO_DATA)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Bulk readiness job
+Computes ReadinessSnapshot rows for every user over a date range, e.g. nightly:
+
+    python readiness_job.py --from 2025-01-01 --to 2025-01-31 --workers 4
+
+Users are streamed in keyset pages and scored in a process pool; the parent
+bulk-writes each page and records a checkpoint so an interrupted run can
+continue with --resume.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add the current directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlmodel import Session, select
+from analytics import load_histories
+from db import create_db_and_tables, engine
+from models import User
+from readiness_engine import history_range, score_history, snapshot_rows, store_snapshots
+
+DEFAULT_CHECKPOINT = "readiness_job.checkpoint.json"
+
+def _init_worker():
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+def score_users(user_ids: List[int], start: date, end: date) -> List[Tuple[int, List[Dict[str, Any]], List[date]]]:
+    """Worker: score a chunk of users read-only and return their snapshot rows"""
+    lookback = history_range(start)[0]
+    with Session(engine) as session:
+        histories = load_histories(session, user_ids, lookback, end)
+    scored = []
+    for user_id in user_ids:
+        results, empty_days = score_history(histories[user_id], start, end)
+        scored.append((user_id, snapshot_rows(user_id, results), empty_days))
+    return scored
+
+def iter_user_pages(page_size: int, after_id: int = 0):
+    """
+    Stream user ids in keyset-paginated pages.
+    Each page is read in its own short session, so no read transaction (and, on SQLite WAL,
+    no snapshot blocking checkpoints) stays open while the page is being scored.
+    """
+    while True:
+        with Session(engine) as session:
+            page = session.exec(
+                select(User.id).where(User.id > after_id).order_by(User.id).limit(page_size)
+            ).all()
+        if not page:
+            return
+        yield list(page)
+        after_id = page[-1]
+
+def load_checkpoint(path: Path, start: date, end: date) -> int:
+    """Last completed user id for this date range, or 0"""
+    if not path.exists():
+        return 0
+    data = json.loads(path.read_text())
+    if data.get("from") != start.isoformat() or data.get("to") != end.isoformat():
+        print(f"⚠️  Checkpoint {path} is for {data.get('from')}..{data.get('to')}, starting over")
+        return 0
+    return int(data.get("last_user_id", 0))
+
+def save_checkpoint(path: Path, start: date, end: date, last_user_id: int):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"from": start.isoformat(), "to": end.isoformat(), "last_user_id": last_user_id}))
+    os.replace(tmp, path)
+
+def run(
+    start: date,
+    end: date,
+    workers: int,
+    page_size: int,
+    chunk_size: int,
+    checkpoint: Path,
+    resume: bool
+):
+    after_id = load_checkpoint(checkpoint, start, end) if resume else 0
+    if after_id:
+        print(f"⏩ Resuming after user {after_id}")
+
+    users_done = 0
+    snapshots_written = 0
+    markers_written = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for page in iter_user_pages(page_size, after_id):
+            chunks = [page[i:i + chunk_size] for i in range(0, len(page), chunk_size)]
+            futures = [pool.submit(score_users, chunk, start, end) for chunk in chunks]
+
+            with Session(engine) as session:
+                for future in futures:
+                    for user_id, rows, empty_days in future.result():
+                        store_snapshots(session, user_id, rows, empty_days)
+                        snapshots_written += len(rows)
+                        markers_written += len(empty_days)
+                session.commit()
+
+            save_checkpoint(checkpoint, start, end, page[-1])
+            users_done += len(page)
+            elapsed = time.perf_counter() - started
+            # Rate of all rows written: scored snapshots plus no-data markers
+            print(
+                f"📈 {users_done} users, {snapshots_written} snapshots + {markers_written} no-data markers "
+                f"({users_done / elapsed:.1f} users/s, {(snapshots_written + markers_written) / elapsed:.1f} rows/s)"
+            )
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"🎉 Readiness job complete: {users_done} users, {snapshots_written} snapshots "
+        f"+ {markers_written} no-data markers in {elapsed:.1f}s"
+    )
+    if checkpoint.exists():
+        checkpoint.unlink()
+
+def main(argv: Optional[List[str]] = None):
+    """Main readiness job entry point"""
+    parser = argparse.ArgumentParser(description="Compute readiness snapshots for every user")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=date.today(),
+                        help="First day to score (YYYY-MM-DD, default today)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=date.today(),
+                        help="Last day to score (YYYY-MM-DD, default today)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--page-size", type=int, default=1000, help="Users fetched per page")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Users scored per worker task")
+    parser.add_argument("--checkpoint", type=Path, default=Path(DEFAULT_CHECKPOINT))
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    args = parser.parse_args(argv)
+
+    if args.end < args.start:
+        parser.error("--to must not be before --from")
+
+    print(f"🚀 Scoring readiness {args.start}..{args.end} with {args.workers} workers")
+    create_db_and_tables()
+    run(args.start, args.end, args.workers, args.page_size, args.chunk_size, args.checkpoint, args.resume)
+
+if __name__ == "__main__":
+    main()
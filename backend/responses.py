@@ -0,0 +1,45 @@
+"""
+Fast JSON responses.
+
+FastJSONResponse is the app's default response class. It is not FastAPI's
+ORJSONResponse: it picks the encoder by content. Pydantic models and lists of
+models are written by pydantic-core's serializer straight from the models;
+other data (what FastAPI hands over after validating against `response_model`)
+is encoded with orjson, or pydantic-core when orjson is not installed.
+Handlers that already build typed response models can return one directly
+(`return FastJSONResponse(model)`): FastAPI then skips its second pass of
+dumping, re-validating and re-serializing against `response_model`. The
+declared `response_model` still documents the endpoint in OpenAPI.
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def orjson_available() -> bool:
+    return orjson is not None
+
+def _is_models(content: Any) -> bool:
+    if isinstance(content, (list, tuple)):
+        return bool(content) and isinstance(content[0], BaseModel)
+    return isinstance(content, BaseModel)
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain data and pydantic models to compact JSON bytes"""
+    if orjson is None or _is_models(content):
+        return to_json(content, inf_nan_mode="null")
+    # Models, dates, etc. that orjson doesn't know are converted by pydantic-core
+    return orjson.dumps(content, default=to_jsonable_python, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with `dumps` (pydantic-core for models, orjson for plain data)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
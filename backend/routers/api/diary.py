@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, timedelta
 from typing import List, Optional
-from deps import get_current_user, get_session
+from deps import get_request_user, get_session
 from models import User, DiaryEntry
+from responses import FastJSONResponse
 from schemas.api import DiaryCreateRequest, DiaryEntryResponse
 
 router = APIRouter()
@@ -12,24 +14,10 @@ router = APIRouter()
 async def get_diary(
     from_date: Optional[date] = Query(None, description="Start date"),
     to_date: Optional[date] = Query(None, description="End date"),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
 ):
     """Get diary entries for the specified date range (no auth required)"""
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
     query = select(DiaryEntry).where(DiaryEntry.user_id == user.id)
     
     if from_date:
@@ -42,9 +30,9 @@ async def get_diary(
         default_from = date.today() - timedelta(days=7)
         query = query.where(DiaryEntry.date >= default_from)
     
-    entries = session.exec(query.order_by(DiaryEntry.date.desc())).all()
+    entries = (await session.exec(query.order_by(DiaryEntry.date.desc()))).all()
     
-    return [
+    return FastJSONResponse([
         DiaryEntryResponse(
             id=entry.id,
             date=entry.date.isoformat(),
@@ -52,29 +40,15 @@ async def get_diary(
             text=entry.text
         )
         for entry in entries
-    ]
+    ])
 
 @router.post("/diary", response_model=DiaryEntryResponse, tags=["Frontend API"])
 async def create_diary_entry(
     request: DiaryCreateRequest,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
 ):
     """Create a new diary entry (no auth required)"""
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
     entry_date = request.date or date.today()
     
     entry = DiaryEntry(
@@ -84,12 +58,12 @@ async def create_diary_entry(
         text=request.text
     )
     session.add(entry)
-    session.commit()
-    session.refresh(entry)
+    await session.commit()
+    await session.refresh(entry)
     
-    return DiaryEntryResponse(
+    return FastJSONResponse(DiaryEntryResponse(
         id=entry.id,
         date=entry.date.isoformat(),
         type=entry.type,
         text=entry.text
-    )
+    ))
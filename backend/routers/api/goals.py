@@ -1,37 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
-from deps import get_current_user, get_session
+from deps import get_request_user, get_session
 from models import User, Goal
+from responses import FastJSONResponse
 from schemas.api import GoalCreateRequest, GoalResponse
 
 router = APIRouter()
 
 @router.get("/goals", response_model=List[GoalResponse], tags=["Frontend API"])
 async def get_goals(
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
 ):
     """Get all goals for current user (no auth required)"""
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
-    goals = session.exec(
+    goals = (await session.exec(
         select(Goal).where(Goal.user_id == user.id).order_by(Goal.created_at.desc())
-    ).all()
+    )).all()
     
-    return [
+    return FastJSONResponse([
         GoalResponse(
             id=goal.id,
             category=goal.category,
@@ -39,71 +27,43 @@ async def get_goals(
             created=goal.created_at.isoformat()
         )
         for goal in goals
-    ]
+    ])
 
 @router.post("/goals", response_model=GoalResponse, tags=["Frontend API"])
 async def create_goal(
     request: GoalCreateRequest,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
 ):
     """Create a new goal (no auth required)"""
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
     goal = Goal(
         user_id=user.id,
         category=request.category,
         text=request.text
     )
     session.add(goal)
-    session.commit()
-    session.refresh(goal)
+    await session.commit()
+    await session.refresh(goal)
     
-    return GoalResponse(
+    return FastJSONResponse(GoalResponse(
         id=goal.id,
         category=goal.category,
         text=goal.text,
         created=goal.created_at.isoformat()
-    )
+    ))
 
 @router.delete("/goals/{goal_id}", tags=["Frontend API"])
 async def delete_goal(
     goal_id: int,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
 ):
     """Delete a goal (no auth required)"""
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
-    goal = session.exec(
+    goal = (await session.exec(
         select(Goal)
         .where(Goal.id == goal_id)
         .where(Goal.user_id == user.id)
-    ).first()
+    )).first()
     
     if not goal:
         raise HTTPException(
@@ -111,7 +71,7 @@ async def delete_goal(
             detail="Goal not found"
         )
     
-    session.delete(goal)
-    session.commit()
+    await session.delete(goal)
+    await session.commit()
     
     return {"ok": True}
@@ -1,124 +1,161 @@
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session, select
+import codecs
+import io
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, timedelta
-from typing import List
-from deps import get_current_user, get_session
-from models import User, MetricSample
+from typing import List, Optional
+from deps import get_request_user, get_session
+from models import User
 from schemas.api import MetricTimelineItem, MetricsImportRequest, MetricsImportResponse
+from ingest import ImportStats, MetricImporter, detect_period, iter_text_lines
+from timeline_cache import etag_matches, timeline_cache
+from analytics import INT_FIELDS, METRIC_FIELDS, MetricSeries, bucket_history, load_series, lttb_indices
+from config import settings
+from responses import FastJSONResponse
 
 router = APIRouter()
 
+timeline_adapter = TypeAdapter(List[MetricTimelineItem])
+
+# MetricTimelineItem field -> MetricSample column
+TIMELINE_FIELDS = {
+    "sleep": "sleep_h",
+    "stress": "stress",
+    "steps": "steps",
+    "cardio": "cardio",
+    "active": "active_min",
+    "dist": "distance_km",
+    "cal": "calories",
+}
+
 @router.get("/metrics/timeline", response_model=List[MetricTimelineItem], tags=["Frontend API"])
 async def get_metrics_timeline(
-    period: str = Query("week", description="Time period: week or month"),
-    session: Session = Depends(get_session)
+    period: str = Query("week", description="Time period: week or month (ignored when from/to is given)"),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (YYYY-MM-DD); defaults to the first sample"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day (YYYY-MM-DD); defaults to today"),
+    bucket: str = Query("day", pattern="^(day|week|month)$", description="Aggregate into day, week or month means"),
+    points: Optional[int] = Query(None, ge=3, description="Downsample to at most this many points (LTTB)"),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
 ):
-    """Get metrics timeline for the specified period (no auth required)"""
+    """
+    Get metrics timeline for the specified period or date range (no auth required).
+    Responses are capped at TIMELINE_MAX_POINTS points, cached until the user's next
+    import and carry an ETag; a matching If-None-Match returns 304.
+    """
     today = date.today()
+    if from_date is not None or to_date is not None:
+        start, end = from_date, to_date or today
+        if start is not None and start > end:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'")
+    else:
+        # Unknown periods fall back to week; normalizing keeps them from filling the cache
+        if period not in ("week", "month"):
+            period = "week"
+        start, end = today - timedelta(days=7 if period == "week" else 30), None
+    max_points = min(points or settings.timeline_max_points, settings.timeline_max_points)
+    query = (start, end, today, bucket, max_points)
     
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
-    if period == "week":
-        start_date = today - timedelta(days=7)
-    elif period == "month":
-        start_date = today - timedelta(days=30)
+    cached = timeline_cache.get(user.id, query)
+    if cached is None:
+        generation = timeline_cache.generation(user.id)
+        series = await session.run_sync(load_series, user.id, start, end)
+        body = timeline_adapter.dump_json(build_timeline(series, bucket, max_points))
+        etag = timeline_cache.put(user.id, query, body, generation)
     else:
-        start_date = today - timedelta(days=7)
+        body, etag = cached
     
-    metrics = session.exec(
-        select(MetricSample)
-        .where(MetricSample.user_id == user.id)
-        .where(MetricSample.date >= start_date)
-        .order_by(MetricSample.date)
-    ).all()
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        timeline_cache.record_not_modified()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/metrics/timeline/cache/stats", tags=["Frontend API"])
+async def timeline_cache_stats():
+    """Timeline response cache hit/miss counters"""
+    return timeline_cache.stats()
+
+def build_timeline(series: MetricSeries, bucket: str, max_points: int) -> List[MetricTimelineItem]:
+    """Bucket a series into timeline items, LTTB-downsampled to at most max_points"""
+    dates, columns = bucket_history(series, bucket)
+    indices = range(len(dates))
+    if len(dates) > max_points:
+        x = np.array([day.toordinal() for day in dates])
+        indices = lttb_indices(x, np.column_stack([columns[name] for name in METRIC_FIELDS]), max_points)
     
-    timeline = []
-    for metric in metrics:
-        timeline.append(MetricTimelineItem(
-            date=metric.date.isoformat(),
-            sleep=metric.sleep_h,
-            stress=metric.stress,
-            steps=metric.steps,
-            cardio=metric.cardio,
-            active=metric.active_min,
-            dist=metric.distance_km,
-            cal=metric.calories
-        ))
+    def value(name: str, index: int):
+        number = columns[name][index]
+        if np.isnan(number):
+            return None
+        if name in INT_FIELDS:
+            return int(round(number))
+        # Daily values are the samples themselves; bucket means are rounded
+        return float(number) if bucket == "day" else round(float(number), 2)
     
-    return timeline
+    return [
+        MetricTimelineItem(
+            date=dates[index].isoformat(),
+            **{field: value(name, index) for field, name in TIMELINE_FIELDS.items()}
+        )
+        for index in indices
+    ]
 
 @router.post("/metrics/import", response_model=MetricsImportResponse, tags=["Frontend API"])
 async def import_metrics(
     request: MetricsImportRequest,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
 ):
     """Import metrics from CSV data (no auth required)"""
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    # Parse CSV data (reusing logic from frontend)
-    lines = request.csv_data.strip().split('\n')
-    if len(lines) < 2:  # Need header + at least one data row
-        return MetricsImportResponse(rows=0, period_detected="unknown")
-    
-    # Skip header, parse data rows
-    data_rows = []
-    for line in lines[1:]:
-        if line.strip():
-            parts = line.split(',')
-            if len(parts) >= 8:
-                try:
-                    metric = MetricSample(
-                        user_id=user.id,
-                        date=date.fromisoformat(parts[0]),
-                        sleep_h=float(parts[1]) if parts[1] else None,
-                        stress=int(parts[2]) if parts[2] else None,
-                        steps=int(parts[3]) if parts[3] else None,
-                        cardio=int(parts[4]) if parts[4] else None,
-                        active_min=int(parts[5]) if parts[5] else None,
-                        distance_km=float(parts[6]) if parts[6] else None,
-                        calories=int(parts[7]) if parts[7] else None
-                    )
-                    data_rows.append(metric)
-                except (ValueError, IndexError):
-                    continue
+    # Parse CSV data and bulk insert in batches (header row is skipped)
+    importer = MetricImporter(user.id)
+    await session.run_sync(importer.feed, io.StringIO(request.csv_data.strip()))
+    stats = await session.run_sync(importer.finish)
     
-    # Save to database
-    for metric in data_rows:
-        session.add(metric)
-    session.commit()
+    return FastJSONResponse(_import_response(stats))
+
+@router.post("/metrics/import/stream", response_model=MetricsImportResponse, tags=["Frontend API"])
+async def import_metrics_stream(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
+):
+    """
+    Stream a CSV import (no auth required).
+    Accepts either a raw (optionally chunked) text/csv body or a multipart upload
+    with a `file` field. Rows are parsed incrementally and written in fixed-size batches.
+    """
+    importer = MetricImporter(user.id)
     
-    # Determine period
-    if len(data_rows) <= 7:
-        period_detected = "week"
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Missing 'file' upload"
+            )
+        # Multipart uploads are spooled to disk, so read them back line by line
+        await session.run_sync(importer.feed, codecs.iterdecode(upload.file, "utf-8"))
+        await form.close()
     else:
-        period_detected = "month"
+        async for lines in iter_text_lines(request.stream()):
+            await session.run_sync(importer.feed, lines)
     
+    stats = await session.run_sync(importer.finish)
+    
+    return FastJSONResponse(_import_response(stats))
+
+def _import_response(stats: ImportStats) -> MetricsImportResponse:
     return MetricsImportResponse(
-        rows=len(data_rows),
-        period_detected=period_detected
+        rows=stats.rows,
+        period_detected=detect_period(stats.rows) if stats.rows else "unknown",
+        skipped=stats.skipped,
+        elapsed_ms=round(stats.elapsed_s * 1000, 2),
+        rows_per_sec=round(stats.rows_per_sec, 1)
     )
@@ -1,85 +1,31 @@
 from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date
-from deps import get_current_user, get_session
-from models import User, ReadinessSnapshot, MetricSample
+from deps import get_request_user, get_session
+from models import User
 from schemas.api import ReadinessTodayResponse
-from readiness import get_readiness_score
+from readiness_engine import get_readiness
+from responses import FastJSONResponse
 
 router = APIRouter()
 
 @router.get("/readiness/today", response_model=ReadinessTodayResponse, tags=["Frontend API"])
 async def get_readiness_today(
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    user: User = Depends(get_request_user)
 ):
     """Get today's readiness score for current user (no auth required)"""
     today = date.today()
     
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
+    # Materialized snapshot read (computed on first access if missing)
+    result = await session.run_sync(get_readiness, user.id, today)
     
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
-    # Check if we have a cached readiness snapshot for today
-    snapshot = session.exec(
-        select(ReadinessSnapshot)
-        .where(ReadinessSnapshot.user_id == user.id)
-        .where(ReadinessSnapshot.date == today)
-    ).first()
-    
-    if snapshot:
-        # Return cached snapshot
-        return ReadinessTodayResponse(
-            sleep_score=snapshot.factors_json.get("sleep_score"),
-            hr_rest=snapshot.factors_json.get("hr_rest"),
-            hrv=snapshot.factors_json.get("hrv"),
-            fatigue=snapshot.factors_json.get("fatigue"),
-            recommendation=snapshot.recommendation
-        )
-    
-    # Get recent metrics for readiness calculation
-    recent_metrics = session.exec(
-        select(MetricSample)
-        .where(MetricSample.user_id == user.id)
-        .order_by(MetricSample.date.desc())
-        .limit(7)
-    ).all()
-    
-    # Calculate readiness score (simplified logic)
-    if recent_metrics:
-        latest = recent_metrics[0]
-        sleep_score = int(latest.sleep_h * 10) if latest.sleep_h else 75
-        hr_rest = latest.stress if latest.stress else 60
-        hrv = 70 + (sleep_score - 75) // 2  # Simple HRV calculation
-        fatigue = "low" if sleep_score > 80 else "moderate" if sleep_score > 70 else "high"
-        
-        recommendation = "You're well recovered. Ready for high-intensity training."
-        if fatigue == "moderate":
-            recommendation = "You're moderately recovered. A steady training session is fine, but avoid max-intensity efforts."
-        elif fatigue == "high":
-            recommendation = "You need recovery. Focus on light activity or rest today."
-    else:
-        # Default values if no metrics
-        sleep_score = 75
-        hr_rest = 60
-        hrv = 70
-        fatigue = "moderate"
-        recommendation = "No recent data. Consider logging your metrics for better insights."
-    
-    return ReadinessTodayResponse(
-        sleep_score=sleep_score,
-        hr_rest=hr_rest,
-        hrv=hrv,
-        fatigue=fatigue,
-        recommendation=recommendation
-    )
+    # Fall back to neutral defaults when there is no recent data
+    return FastJSONResponse(ReadinessTodayResponse(
+        sleep_score=result.factor_value("Sleep Quality", 75),
+        hr_rest=result.factor_value("Resting Heart Rate", 60),
+        hrv=result.factor_value("HRV", 70),
+        fatigue=result.fatigue,
+        recommendation=result.recommendation
+    ))
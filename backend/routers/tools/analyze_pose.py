@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from config import settings
+from deps import verify_agent_token, get_agent_user
+from models import User
+from pose_engine import PoseInputError, analyze, pack_keypoints
+from responses import FastJSONResponse
+from tool_log import UNAUDITED_FIELDS, ToolAudit, get_tool_audit
+from schemas.tools import AnalyzePoseRequest, AnalyzePoseResponse
+
+router = APIRouter()
+
+@router.post("/analyzePose", response_model=AnalyzePoseResponse, tags=["Agent Tools"])
+async def analyze_pose(
+    request: AnalyzePoseRequest,
+    _: bool = Depends(verify_agent_token),
+    user: User = Depends(get_agent_user),
+    audit: ToolAudit = Depends(get_tool_audit)
+):
+    """
+    Check exercise form from pose keypoints (agent tool).
+    Scores a whole keypoint sequence at once: joint ranges of motion, left/right symmetry,
+    and flags with coaching cues when `exercise` is given.
+    """
+    # The keypoints themselves are too large to audit; keep the call's shape and outcome
+    args = request.model_dump(exclude=UNAUDITED_FIELDS)
+    with audit.failures("analyzePose", user.id, args):
+        if not request.keypoints:
+            detail = (
+                "Pose estimation from snapshots is not supported; send keypoints"
+                if request.snapshot_base64 else "keypoints are required"
+            )
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+        # Packing and scoring are CPU-bound; keep them off the event loop
+        try:
+            response = await run_in_threadpool(pose_analysis, request)
+        except PoseInputError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    audit.record("analyzePose", user.id, args, frames=response.frames, flags=response.flags)
+    return FastJSONResponse(response)
+
+def pose_analysis(request: AnalyzePoseRequest) -> AnalyzePoseResponse:
+    points = pack_keypoints(request.keypoints, settings.pose_max_frames)
+    result = analyze(points, request.exercise, settings.pose_min_keypoint_score, settings.pose_asymmetry_threshold)
+    return AnalyzePoseResponse(
+        flags=result.flags,
+        cues=result.cues,
+        frames=result.frames,
+        exercise=result.exercise,
+        valid_fraction=result.valid_fraction,
+        joint_ranges=result.joint_ranges,
+        asymmetry=result.asymmetry
+    )
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from deps import verify_agent_token
+from idempotency import idempotency
+from tool_log import tool_log
+
+router = APIRouter()
+
+@router.get("/log/stats", tags=["Agent Tools"])
+async def tool_log_stats(_: bool = Depends(verify_agent_token)):
+    """Tool audit log queue depth, write throughput and drop counters"""
+    if tool_log is None:
+        return {"enabled": False}
+    return {"enabled": True, **tool_log.stats()}
+
+@router.get("/idempotency/stats", tags=["Agent Tools"])
+async def idempotency_stats(_: bool = Depends(verify_agent_token)):
+    """Write tool executions, replays, coalesced duplicates and request_id conflicts"""
+    return idempotency.stats()
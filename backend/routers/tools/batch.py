@@ -0,0 +1,111 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import ValidationError
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Union
+from analytics import HistoryCache
+from config import settings
+from deps import verify_agent_token, get_session, resolve_user
+from responses import FastJSONResponse
+from routers.tools import get_current_metrics, get_readiness_score, get_workout_history
+from tool_log import ToolAudit, get_tool_audit
+from schemas.tools import (
+    BatchToolRequest, BatchToolResponse, ToolCallResult,
+    GetCurrentMetricsRequest, GetReadinessScoreRequest, GetWorkoutHistoryRequest,
+)
+
+router = APIRouter()
+
+# Tool name -> (request model, metric history reservation or None, sync handler)
+TOOLS = {
+    "getCurrentMetrics": (
+        GetCurrentMetricsRequest,
+        get_current_metrics.reserve_history,
+        get_current_metrics.current_metrics,
+    ),
+    "getReadinessScore": (
+        GetReadinessScoreRequest,
+        get_readiness_score.reserve_history,
+        get_readiness_score.readiness_score,
+    ),
+    "getWorkoutHistory": (
+        GetWorkoutHistoryRequest,
+        None,
+        get_workout_history.workout_history,
+    ),
+}
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'args'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+@router.post("/batch", response_model=BatchToolResponse, tags=["Agent Tools"])
+async def run_tool_batch(
+    batch: BatchToolRequest,
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(verify_agent_token),
+    audit: ToolAudit = Depends(get_tool_audit)
+):
+    """
+    Execute several tool calls in one request (agent tool).
+    Calls share one session, overlapping metric reads are fetched once per user,
+    and results are returned in request order.
+    """
+    # A batch that fails as a whole is audited once, under the batch itself
+    with audit.failures("batch", None, batch):
+        if len(batch.calls) > settings.tool_batch_max_calls:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {settings.tool_batch_max_calls} calls per batch"
+            )
+    
+        # Validate calls and declare their metric reads before running anything
+        histories = HistoryCache()
+        planned: List[Union[ToolCallResult, tuple]] = []
+        for call in batch.calls:
+            tool = TOOLS.get(call.tool)
+            if tool is None:
+                planned.append(ToolCallResult(tool=call.tool, ok=False, error=f"Unknown tool '{call.tool}'"))
+                continue
+        
+            request_model, reserve_history, handler = tool
+            try:
+                request = request_model.model_validate(call.args)
+            except ValidationError as exc:
+                planned.append(ToolCallResult(tool=call.tool, ok=False, error=_describe(exc)))
+                continue
+        
+            # Unknown ids fail their call, as the direct tool endpoints answer 404
+            user = await resolve_user(session, request.user_id, fallback_to_demo=False)
+            if user is None:
+                planned.append(ToolCallResult(tool=call.tool, ok=False, error=f"User '{request.user_id}' not found"))
+                continue
+            if reserve_history is not None:
+                reserve_history(histories, user, request)
+            planned.append((call.tool, handler, user, request))
+    
+        def execute(sync_session: Session) -> List[ToolCallResult]:
+            results = []
+            for item in planned:
+                if isinstance(item, ToolCallResult):
+                    results.append(item)
+                    continue
+                name, handler, user, request = item
+                try:
+                    response = handler(sync_session, user, request, histories)
+                except HTTPException as exc:
+                    results.append(ToolCallResult(tool=name, ok=False, error=str(exc.detail)))
+                    continue
+                results.append(ToolCallResult(tool=name, ok=True, result=response.model_dump()))
+            return results
+    
+        results = await session.run_sync(execute)
+    
+    # Audit every call, including ones rejected before running
+    for call, item, result in zip(batch.calls, planned, results):
+        user_id = item[2].id if isinstance(item, tuple) else None
+        audit.record(call.tool, user_id, call.args, ok=result.ok, error=result.error)
+    
+    return FastJSONResponse(BatchToolResponse(results=results))
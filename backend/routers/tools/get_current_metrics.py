@@ -1,50 +1,62 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, timedelta
 from typing import List, Optional
-from deps import verify_agent_token, get_session
-from models import User, MetricSample
+from deps import verify_agent_token, get_agent_user, get_session
+from analytics import CHRONIC_DAYS, HistoryCache, analyze, load_history, trend_notes
+from models import User
+from readiness_engine import score_sample
+from responses import FastJSONResponse
+from tool_log import ToolAudit, get_tool_audit
 from schemas.tools import GetCurrentMetricsRequest, GetCurrentMetricsResponse, MetricFactor
 
 router = APIRouter()
 
+NO_DATA_RECOMMENDATION = "No recent data available. Consider logging your daily metrics for better insights."
+
 @router.post("/getCurrentMetrics", response_model=GetCurrentMetricsResponse, tags=["Agent Tools"])
 async def get_current_metrics(
     request: GetCurrentMetricsRequest,
-    session: Session = Depends(get_session),
-    _: bool = Depends(verify_agent_token)
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(verify_agent_token),
+    user: User = Depends(get_agent_user),
+    audit: ToolAudit = Depends(get_tool_audit)
 ):
     """
     Get current health metrics for the user.
     Returns the most recent metrics data with readiness insights.
     """
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
-    # Get the most recent metrics (last 7 days)
+    with audit.failures("getCurrentMetrics", user.id, request):
+        response = await session.run_sync(current_metrics, user, request)
+    audit.record("getCurrentMetrics", user.id, request)
+    return FastJSONResponse(response)
+
+def _history_range() -> tuple:
+    # The last 7 days plus the 28-day baseline
     today = date.today()
-    start_date = today - timedelta(days=7)
-    
-    recent_metrics = session.exec(
-        select(MetricSample)
-        .where(MetricSample.user_id == user.id)
-        .where(MetricSample.date >= start_date)
-        .order_by(MetricSample.date.desc())
-    ).all()
+    return today - timedelta(days=CHRONIC_DAYS + 7), today
+
+def reserve_history(histories: HistoryCache, user: User, request: GetCurrentMetricsRequest):
+    """Declare the metric history this call reads (used by /tools/batch)"""
+    histories.reserve(user.id, *_history_range())
+
+def current_metrics(
+    session: Session,
+    user: User,
+    request: GetCurrentMetricsRequest,
+    histories: Optional[HistoryCache] = None
+) -> GetCurrentMetricsResponse:
+    """Build the current-metrics tool response on a sync session"""
+    # Load recent history as columns
+    start_date, today = _history_range()
+    if histories is not None:
+        history = histories.load(session, user.id, start_date, today)
+    else:
+        history = load_history(session, user.id, start_date, today)
+    latest_index = history.latest_index(today, 8)
     
-    if not recent_metrics:
+    if latest_index is None:
         # Return default metrics if no data exists
         return GetCurrentMetricsResponse(
             userId=str(user.id),
@@ -60,7 +72,7 @@ async def get_current_metrics(
             },
             readinessScore=75,
             readinessStatus="moderate",
-            recommendation="No recent data available. Consider logging your daily metrics for better insights.",
+            recommendation=NO_DATA_RECOMMENDATION,
             factors=[
                 MetricFactor(
                     name="Sleep",
@@ -87,27 +99,12 @@ async def get_current_metrics(
             notes="Using default metrics as no recent data is available."
         )
     
-    # Get the most recent metric
-    latest_metric = recent_metrics[0]
-    
-    # Calculate readiness score based on metrics
-    sleep_score = int(latest_metric.sleep_h * 10) if latest_metric.sleep_h else 75
-    stress_score = 100 - (latest_metric.stress or 30)  # Lower stress = higher score
-    activity_score = min(100, (latest_metric.steps or 8000) // 100)  # 10k steps = 100 score
+    # Get the most recent metric and its rolling trends
+    latest_metric = history.row(latest_index)
+    trends = analyze(history).summary(latest_index)
     
-    # Calculate overall readiness score
-    readiness_score = (sleep_score + stress_score + activity_score) // 3
-    
-    # Determine readiness status
-    if readiness_score >= 80:
-        readiness_status = "high"
-        recommendation = "You're well recovered and ready for high-intensity training."
-    elif readiness_score >= 60:
-        readiness_status = "moderate"
-        recommendation = "You're moderately recovered. A steady training session is fine, but avoid max-intensity efforts."
-    else:
-        readiness_status = "low"
-        recommendation = "You need recovery. Focus on light activity or rest today."
+    # Score readiness with the shared readiness engine
+    readiness = score_sample(latest_metric, trends)
     
     # Create factors list
     factors = []
@@ -162,6 +159,26 @@ async def get_current_metrics(
             description="Active exercise minutes"
         ))
     
+    sleep_avg = trends.mean_7d.get("sleep_h")
+    if sleep_avg is not None:
+        sleep_slope = trends.slope_7d.get("sleep_h") or 0.0
+        factors.append(MetricFactor(
+            name="Sleep (7-day avg)",
+            value=round(sleep_avg, 2),
+            unit="hours",
+            impact="positive" if sleep_avg >= 7 else "negative" if sleep_avg < 6 else "neutral",
+            description=f"Trend {sleep_slope:+.2f} h/day over the last week"
+        ))
+    
+    if trends.acwr is not None:
+        factors.append(MetricFactor(
+            name="Training Load",
+            value=round(trends.acwr, 2),
+            unit="ratio",
+            impact="negative" if trends.acwr > 1.5 else "positive" if 0.8 <= trends.acwr <= 1.3 else "neutral",
+            description="Acute:chronic workload ratio (7-day vs 28-day active minutes)"
+        ))
+    
     # Generate notes based on metrics
     notes_parts = []
     if latest_metric.sleep_h and latest_metric.sleep_h < 7:
@@ -171,6 +188,8 @@ async def get_current_metrics(
     if latest_metric.steps and latest_metric.steps < 8000:
         notes_parts.append("Daily activity is below target.")
     
+    notes_parts.extend(trend_notes(trends))
+    
     notes = " ".join(notes_parts) if notes_parts else "Metrics look good overall."
     
     return GetCurrentMetricsResponse(
@@ -185,9 +204,9 @@ async def get_current_metrics(
             "distance": latest_metric.distance_km or 6.2,
             "calories": latest_metric.calories or 2200
         },
-        readinessScore=readiness_score,
-        readinessStatus=readiness_status,
-        recommendation=recommendation,
+        readinessScore=readiness.score,
+        readinessStatus=readiness.status,
+        recommendation=readiness.recommendation,
         factors=factors,
         notes=notes
     )
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, Depends, Header
-from sqlmodel import Session, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date
 from typing import Optional
-from deps import verify_agent_token, get_session
-from models import User, ReadinessSnapshot, MetricSample
+from analytics import HistoryCache
+from deps import verify_agent_token, get_agent_user, get_session
+from models import User
+from readiness_engine import get_readiness, history_range
+from responses import FastJSONResponse
+from tool_log import ToolAudit, get_tool_audit
 from schemas.tools import GetReadinessScoreRequest, GetReadinessScoreResponse, ReadinessScore, ReadinessFactor
 
 router = APIRouter()
@@ -11,145 +16,66 @@ router = APIRouter()
 @router.post("/getReadinessScore", response_model=GetReadinessScoreResponse, tags=["Agent Tools"])
 async def get_readiness_score_tool(
     request: GetReadinessScoreRequest,
-    session: Session = Depends(get_session),
-    _: bool = Depends(verify_agent_token)
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(verify_agent_token),
+    user: User = Depends(get_agent_user),
+    audit: ToolAudit = Depends(get_tool_audit)
 ):
     """Get readiness score for a user (agent tool)"""
-    # Get the first user (demo user)
-    user = session.exec(select(User)).first()
-    
-    if not user:
-        # Create demo user if none exists
-        user = User(
-            email="demo@example.com",
-            name="Demo User",
-            height_cm=175.0,
-            weight_kg=70.0
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-    
+    with audit.failures("getReadinessScore", user.id, request):
+        response = await session.run_sync(readiness_score, user, request)
+    audit.record("getReadinessScore", user.id, request)
+    return FastJSONResponse(response)
+
+def _target_date(request: GetReadinessScoreRequest) -> date:
     # Handle date parameter (string or None)
     if request.date:
         try:
-            target_date = date.fromisoformat(request.date)
+            return date.fromisoformat(request.date)
         except ValueError:
-            target_date = date.today()
-    else:
-        target_date = date.today()
-    
-    # Check for cached readiness snapshot
-    snapshot = session.exec(
-        select(ReadinessSnapshot)
-        .where(ReadinessSnapshot.user_id == user.id)
-        .where(ReadinessSnapshot.date == target_date)
-    ).first()
-    
-    if snapshot:
-        # Return cached snapshot
-        factors = []
-        for factor_name, factor_data in snapshot.factors_json.items():
-            if isinstance(factor_data, dict):
-                factors.append(ReadinessFactor(
-                    name=factor_name,
-                    value=factor_data.get("value", 0),
-                    unit=factor_data.get("unit"),
-                    impact=factor_data.get("impact", "neutral")
-                ))
-            else:
-                factors.append(ReadinessFactor(
-                    name=factor_name,
-                    value=factor_data,
-                    impact="neutral"
-                ))
-        
-        return GetReadinessScoreResponse(
-            user_id=str(user.id),
-            date=target_date.isoformat(),
-            readiness_score=ReadinessScore(
-                score=snapshot.score,
-                status=snapshot.status,
-                recommendation=snapshot.recommendation,
-                factors=factors
-            )
-        )
+            return date.today()
+    return date.today()
+
+def reserve_history(histories: HistoryCache, user: User, request: GetReadinessScoreRequest):
+    """Declare the metric history this call may read (used by /tools/batch)"""
+    histories.reserve(user.id, *history_range(_target_date(request)))
+
+def readiness_score(
+    session: Session,
+    user: User,
+    request: GetReadinessScoreRequest,
+    histories: Optional[HistoryCache] = None
+) -> GetReadinessScoreResponse:
+    """Build the readiness tool response on a sync session"""
+    target_date = _target_date(request)
     
-    # Calculate readiness from metrics
-    recent_metrics = session.exec(
-        select(MetricSample)
-        .where(MetricSample.user_id == user.id)
-        .order_by(MetricSample.date.desc())
-        .limit(7)
-    ).all()
+    # Materialized snapshot read (computed on first access if missing)
+    result = get_readiness(session, user.id, target_date, histories)
     
-    if recent_metrics:
-        latest = recent_metrics[0]
-        
-        # Calculate factors
-        factors = []
-        
-        # Sleep quality
-        if latest.sleep_h:
-            sleep_score = int(latest.sleep_h * 10)
-            factors.append(ReadinessFactor(
-                name="Sleep Quality",
-                value=sleep_score,
-                unit="score",
-                impact="positive" if sleep_score > 80 else "neutral" if sleep_score > 70 else "negative"
-            ))
-        
-        # Resting heart rate
-        if latest.stress:  # Using stress as proxy for HR
-            hr_rest = latest.stress
+    factors = []
+    for factor_name, factor_data in result.factors.items():
+        if isinstance(factor_data, dict):
             factors.append(ReadinessFactor(
-                name="Resting Heart Rate",
-                value=hr_rest,
-                unit="bpm",
-                impact="positive" if hr_rest < 60 else "neutral" if hr_rest < 70 else "negative"
+                name=factor_name,
+                value=factor_data.get("value", 0),
+                unit=factor_data.get("unit"),
+                impact=factor_data.get("impact", "neutral")
             ))
-        
-        # HRV (calculated)
-        if latest.sleep_h:
-            hrv = 70 + (int(latest.sleep_h * 10) - 75) // 2
+        else:
             factors.append(ReadinessFactor(
-                name="HRV",
-                value=hrv,
-                unit="ms",
-                impact="positive" if hrv > 75 else "neutral" if hrv > 65 else "negative"
+                name=factor_name,
+                value=factor_data,
+                impact="neutral"
             ))
-        
-        # Overall score calculation
-        positive_factors = sum(1 for f in factors if f.impact == "positive")
-        negative_factors = sum(1 for f in factors if f.impact == "negative")
-        
-        if positive_factors > negative_factors:
-            score = 85
-            status = "good"
-            recommendation = "You're well recovered. Ready for high-intensity training."
-        elif negative_factors > positive_factors:
-            score = 45
-            status = "poor"
-            recommendation = "You need recovery. Focus on light activity or rest today."
-        else:
-            score = 65
-            status = "moderate"
-            recommendation = "You're moderately recovered. A steady training session is fine, but avoid max-intensity efforts."
-    else:
-        # Default values
-        score = 50
-        status = "unknown"
-        recommendation = "No recent data available. Consider logging your metrics for better insights."
-        factors = []
     
     return GetReadinessScoreResponse(
         user_id=str(user.id),
         date=target_date.isoformat(),
         readiness_score=ReadinessScore(
-            score=score,
-            status=status,
-            recommendation=recommendation,
+            score=result.score,
+            status=result.status,
+            recommendation=result.recommendation,
             factors=factors
         ),
-        notes="Calculated from recent metrics" if recent_metrics else "No metrics available"
+        notes="Calculated from recent metrics" if result.factors else "No metrics available"
     )
@@ -0,0 +1,132 @@
+import base64
+import re
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import date, timedelta
+from typing import Optional, Tuple
+from analytics import HistoryCache
+from config import settings
+from deps import verify_agent_token, get_agent_user, get_session
+from models import User, WorkoutSession
+from responses import FastJSONResponse
+from tool_log import ToolAudit, get_tool_audit
+from schemas.tools import GetWorkoutHistoryRequest, GetWorkoutHistoryResponse, WorkoutHistoryItem
+
+router = APIRouter()
+
+RANGE_PATTERN = re.compile(r"^(\d+)([dwmy])$")
+RANGE_UNIT_DAYS = {"d": 1, "w": 7, "m": 30, "y": 365}
+
+# Only the summary fields are read out of data_json; the per-set details stay in the database
+DURATION_MIN = WorkoutSession.data_json["duration_min"].as_integer()
+INTENSITY = WorkoutSession.data_json["intensity"].as_string()
+
+@router.post("/getWorkoutHistory", response_model=GetWorkoutHistoryResponse, tags=["Agent Tools"])
+async def get_workout_history(
+    request: GetWorkoutHistoryRequest,
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(verify_agent_token),
+    user: User = Depends(get_agent_user),
+    audit: ToolAudit = Depends(get_tool_audit)
+):
+    """
+    Get the user's logged workouts, newest first (agent tool).
+    Pages through long histories with `limit` and the returned `next_cursor`.
+    """
+    with audit.failures("getWorkoutHistory", user.id, request):
+        response = await session.run_sync(workout_history, user, request)
+    audit.record("getWorkoutHistory", user.id, request)
+    return FastJSONResponse(response)
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+def history_window(request: GetWorkoutHistoryRequest) -> Tuple[Optional[date], date]:
+    """Inclusive (start, end) dates; start is None for "all" """
+    end = request.to_date or date.today()
+    if request.from_date:
+        if request.from_date > end:
+            raise _bad_request(f"from_date {request.from_date} is after to_date {end}")
+        return request.from_date, end
+    value = request.range.strip().lower()
+    if value == "all":
+        return None, end
+    match = RANGE_PATTERN.match(value)
+    if not match:
+        raise _bad_request(f"Invalid range '{request.range}', expected e.g. 7d, 12w, 6m, 1y or all")
+    days = int(match.group(1)) * RANGE_UNIT_DAYS[match.group(2)]
+    if days > (end - date.min).days:
+        # Reaches back past the start of the calendar, i.e. the whole history
+        return None, end
+    return end - timedelta(days=max(days, 1) - 1), end
+
+def encode_cursor(day: date, session_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{day.isoformat()}:{session_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        day, session_id = raw.split(":")
+        return date.fromisoformat(day), int(session_id)
+    except ValueError:
+        raise _bad_request("Invalid cursor")
+
+def workout_history(
+    session: Session,
+    user: User,
+    request: GetWorkoutHistoryRequest,
+    histories: Optional[HistoryCache] = None
+) -> GetWorkoutHistoryResponse:
+    """Build one page of the workout history tool response on a sync session"""
+    start, end = history_window(request)
+    limit = min(max(request.limit or settings.workout_history_page_size, 1), settings.workout_history_max_page_size)
+
+    if request.cursor:
+        cursor_date, cursor_id = decode_cursor(request.cursor)
+        end = min(end, cursor_date)
+
+    query = (
+        select(
+            WorkoutSession.id,
+            WorkoutSession.date,
+            WorkoutSession.activity,
+            WorkoutSession.notes,
+            DURATION_MIN,
+            INTENSITY,
+        )
+        .where(WorkoutSession.user_id == user.id)
+        .where(WorkoutSession.date <= end)
+    )
+    if start is not None:
+        query = query.where(WorkoutSession.date >= start)
+    if request.cursor:
+        # Keyset pagination: continue strictly after the last (date, id) of the previous page.
+        # Spelled out rather than as a row-value comparison, and with the date bound above,
+        # so SQLite seeks the (user_id, date) index straight to the cursor
+        query = query.where(or_(
+            WorkoutSession.date < cursor_date,
+            and_(WorkoutSession.date == cursor_date, WorkoutSession.id < cursor_id)
+        ))
+
+    # One extra row tells whether another page follows
+    rows = session.exec(
+        query.order_by(WorkoutSession.date.desc(), WorkoutSession.id.desc()).limit(limit + 1)
+    ).all()
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].date, page[-1].id) if len(rows) > limit else None
+    return GetWorkoutHistoryResponse(
+        workouts=[
+            WorkoutHistoryItem(
+                date=row.date.isoformat(),
+                activity=row.activity,
+                duration_min=row[4],
+                intensity=row[5],
+                notes=row.notes
+            )
+            for row in page
+        ],
+        next_cursor=next_cursor
+    )
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import date
+from deps import verify_agent_token, get_agent_user, get_session
+from models import User
+from responses import dumps
+from tool_log import ToolAudit, get_tool_audit
+from workout_plans import PlanEntry, load_plan, plan_cache, plan_days_adapter, week_start_of
+from schemas.tools import GetWorkoutPlanRequest, GetWorkoutPlanResponse
+
+router = APIRouter()
+
+def plan_response(entry: PlanEntry) -> GetWorkoutPlanResponse:
+    return GetWorkoutPlanResponse(
+        plan=plan_days_adapter.validate_python(entry.plan_json.get("plan") or []),
+        plan_id=str(entry.plan_id) if entry.plan_id is not None else None,
+        week_start=entry.week_start.isoformat(),
+        version=entry.version
+    )
+
+@router.post("/getWorkoutPlan", response_model=GetWorkoutPlanResponse, tags=["Agent Tools"])
+async def get_workout_plan(
+    request: GetWorkoutPlanRequest,
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(verify_agent_token),
+    user: User = Depends(get_agent_user),
+    audit: ToolAudit = Depends(get_tool_audit)
+):
+    """
+    Get the user's workout plan for a week, the current week by default (agent tool).
+    The returned `version` is what `updateWorkoutPlan` checks `expected_version` against.
+    """
+    with audit.failures("getWorkoutPlan", user.id, request):
+        entry = await load_plan(session, user.id, week_start_of(request.week_start or date.today()))
+        if entry.body is None:
+            # Cached current-week entries keep their serialized response
+            entry.body = dumps(plan_response(entry))
+    audit.record("getWorkoutPlan", user.id, request)
+    return Response(content=entry.body, media_type="application/json")
+
+@router.get("/plan/cache/stats", tags=["Agent Tools"])
+async def plan_cache_stats(_: bool = Depends(verify_agent_token)):
+    """Current-week plan cache hit rate and size"""
+    return plan_cache.stats()
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Dict, Optional
+from deps import verify_agent_token, get_agent_user, get_session
+from idempotency import idempotency
+from models import User, WorkoutSession
+from tool_log import ToolAudit, get_tool_audit
+from schemas.tools import LogWorkoutSessionRequest, LogWorkoutSessionResponse, WorkoutSessionData
+
+router = APIRouter()
+
+TOOL = "logWorkoutSession"
+
+def _intensity(data: WorkoutSessionData) -> Optional[str]:
+    """Session intensity from the average RPE of its rated sets"""
+    rpes = [s.rpe for s in data.sets if s.rpe is not None]
+    if not rpes:
+        return None
+    average = sum(rpes) / len(rpes)
+    return "low" if average <= 4 else "moderate" if average <= 7 else "high"
+
+def session_data(data: WorkoutSessionData) -> Dict[str, Any]:
+    """data_json for a logged session: the sets plus summary fields read by workout history"""
+    durations = [s.duration_s for s in data.sets if s.duration_s is not None]
+    return {
+        "sets": [s.model_dump() for s in data.sets],
+        "duration_min": round(sum(durations) / 60) if durations else None,
+        "intensity": _intensity(data),
+    }
+
+@router.post("/logWorkoutSession", response_model=LogWorkoutSessionResponse, tags=["Agent Tools"])
+async def log_workout_session(
+    request: LogWorkoutSessionRequest,
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(verify_agent_token),
+    user: User = Depends(get_agent_user),
+    audit: ToolAudit = Depends(get_tool_audit)
+):
+    """
+    Log a completed workout session (agent tool).
+    Idempotent per `request_id`: retries return the original response without logging the session twice.
+    """
+    async def execute() -> LogWorkoutSessionResponse:
+        entry = WorkoutSession(
+            user_id=user.id,
+            date=request.session.date,
+            activity=request.session.activity,
+            notes=request.session.notes,
+            data_json=session_data(request.session)
+        )
+        session.add(entry)
+        await session.flush()
+        return LogWorkoutSessionResponse(ok=True, session_id=str(entry.id))
+
+    with audit.failures(TOOL, user.id, request, request_id=request.request_id):
+        body, replayed = await idempotency.run(session, TOOL, user.id, request, audit, execute)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true" if replayed else "false"}
+    )
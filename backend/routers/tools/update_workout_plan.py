@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import date
+from typing import List
+from deps import verify_agent_token, get_agent_user, get_session
+from idempotency import idempotency
+from json_patch import PatchError, PatchTestFailed
+from models import User
+from tool_log import ToolAudit, get_tool_audit
+from workout_plans import InvalidPlan, PlanConflict, PlanEntry, patch_operations, plan_cache, update_plan, week_start_of
+from schemas.tools import UpdateWorkoutPlanRequest, UpdateWorkoutPlanResponse
+
+router = APIRouter()
+
+TOOL = "updateWorkoutPlan"
+
+@router.post("/updateWorkoutPlan", response_model=UpdateWorkoutPlanResponse, tags=["Agent Tools"])
+async def update_workout_plan(
+    request: UpdateWorkoutPlanRequest,
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(verify_agent_token),
+    user: User = Depends(get_agent_user),
+    audit: ToolAudit = Depends(get_tool_audit)
+):
+    """
+    Apply `changes` to the user's workout plan for a week, the current week by default (agent tool).
+    `changes` is {"patch": [JSON Patch operations]} or a {"/json/pointer": value} map; list
+    elements of the plan can be addressed by day name (`/plan/Monday/exercises/0/reps`).
+    With `expected_version`, the update fails with 409 if the plan changed since it was read.
+    Idempotent per `request_id`.
+    """
+    week_start = week_start_of(request.week_start or date.today())
+    updated: List[PlanEntry] = []
+
+    async def execute() -> UpdateWorkoutPlanResponse:
+        try:
+            entry = await update_plan(
+                session, user.id, week_start, patch_operations(request.changes), request.expected_version
+            )
+        except PatchTestFailed as exc:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+        except PatchError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        except InvalidPlan as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+        except PlanConflict as exc:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(exc),
+                headers={"X-Plan-Version": str(exc.version)}
+            )
+        updated.append(entry)
+        return UpdateWorkoutPlanResponse(ok=True, plan_id=str(entry.plan_id), version=entry.version)
+
+    with audit.failures(TOOL, user.id, request, request_id=request.request_id):
+        body, replayed = await idempotency.run(session, TOOL, user.id, request, audit, execute)
+    if updated and not replayed:
+        # Committed by now, so the cache can move to the new version (a replay rolled it back)
+        plan_cache.put(user.id, updated[0])
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true" if replayed else "false"}
+    )
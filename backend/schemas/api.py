@@ -35,6 +35,9 @@ class MetricsImportRequest(BaseModel):
 class MetricsImportResponse(BaseModel):
     rows: int
     period_detected: str
+    skipped: int = 0
+    elapsed_ms: Optional[float] = None
+    rows_per_sec: Optional[float] = None
 
 # Regimen schemas
 class RegimenPlanItem(BaseModel):
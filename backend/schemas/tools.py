@@ -55,7 +55,11 @@ class GetReadinessScoreResponse(BaseModel):
 # Get Workout History
 class GetWorkoutHistoryRequest(BaseModel):
     user_id: str
-    range: str  # "7d" | "30d"
+    range: str = "30d"  # "<n>d" | "<n>w" | "<n>m" | "<n>y" | "all"; ignored when from_date is set
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    limit: Optional[int] = None
+    cursor: Optional[str] = None  # next_cursor of the previous page
 
 class WorkoutHistoryItem(BaseModel):
     date: str
@@ -66,6 +70,7 @@ class WorkoutHistoryItem(BaseModel):
 
 class GetWorkoutHistoryResponse(BaseModel):
     workouts: List[WorkoutHistoryItem]
+    next_cursor: Optional[str] = None
 
 # Get Workout Plan
 class GetWorkoutPlanRequest(BaseModel):
@@ -85,18 +90,25 @@ class WorkoutPlanDay(BaseModel):
 
 class GetWorkoutPlanResponse(BaseModel):
     plan: List[WorkoutPlanDay]
+    plan_id: Optional[str] = None
+    week_start: Optional[str] = None
+    version: int = 0  # pass back as expected_version when updating
 
 # Update Workout Plan
 class UpdateWorkoutPlanRequest(BaseModel):
     user_id: str
+    # {"patch": [RFC 6902 operations]} or {"/json/pointer": value, ...}
     changes: Dict[str, Any]
     reason: Optional[str] = None
+    week_start: Optional[date] = None
+    expected_version: Optional[int] = None
     session_id: Optional[str] = None
     request_id: Optional[str] = None
 
 class UpdateWorkoutPlanResponse(BaseModel):
     ok: bool
     plan_id: str
+    version: Optional[int] = None
 
 # Log Workout Session
 class WorkoutSet(BaseModel):
@@ -137,11 +149,24 @@ class LogDailyNoteResponse(BaseModel):
 class AnalyzePoseRequest(BaseModel):
     user_id: str
     snapshot_base64: Optional[str] = None
+    # A sequence of frames, each {"keypoints": {"left_knee": {"x", "y", "score"} | [x, y, score], ...}}
+    # (or the joint map itself), or a single frame as a list of {"name", "x", "y", "score"} points
     keypoints: Optional[List[Dict[str, Any]]] = None
+    exercise: Optional[str] = None  # "squat" | "lunge" | "push_up"; enables range-of-motion checks
+
+class JointRange(BaseModel):
+    min: Optional[float] = None  # degrees
+    max: Optional[float] = None
+    range: Optional[float] = None
 
 class AnalyzePoseResponse(BaseModel):
     flags: List[str]
     cues: List[str]
+    frames: int = 0
+    exercise: Optional[str] = None
+    valid_fraction: float = 0.0  # frames with the tracked joints visible
+    joint_ranges: Dict[str, JointRange] = {}
+    asymmetry: Dict[str, Optional[float]] = {}  # median left/right angle difference in degrees
 
 # Finalize Session
 class FinalizeSessionRequest(BaseModel):
@@ -153,3 +178,20 @@ class FinalizeSessionRequest(BaseModel):
 class FinalizeSessionResponse(BaseModel):
     ok: bool
     recap_id: str
+
+# Batch tool calls
+class ToolCall(BaseModel):
+    tool: str  # e.g. "getCurrentMetrics"
+    args: Dict[str, Any] = {}
+
+class BatchToolRequest(BaseModel):
+    calls: List[ToolCall]
+
+class ToolCallResult(BaseModel):
+    tool: str
+    ok: bool
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BatchToolResponse(BaseModel):
+    results: List[ToolCallResult]
@@ -1,7 +1,8 @@
 from datetime import date, timedelta
 from sqlmodel import Session, select
-from db import engine
-from models import User, MetricSample, Goal, DiaryEntry, WorkoutPlan, ReadinessSnapshot
+from db import engine, upsert_rows
+from models import User, MetricSample, Goal, DiaryEntry, WorkoutPlan
+from readiness_engine import refresh_after_ingest
 
 def seed_database():
     """Seed the database with demo data"""
@@ -22,36 +23,29 @@ def seed_database():
             session.refresh(demo_user)
             print(f"Created demo user: {demo_user.name}")
         
-        # Seed metrics for the last 30 days
+        # Seed metrics for the last 30 days (existing days are left untouched)
         today = date.today()
+        metric_rows = []
         for i in range(30):
             metric_date = today - timedelta(days=i)
             
-            # Check if metric already exists
-            existing = session.exec(
-                select(MetricSample)
-                .where(MetricSample.user_id == demo_user.id)
-                .where(MetricSample.date == metric_date)
-            ).first()
+            # Generate realistic metrics
+            base_sleep = 7.5 + (i % 3 - 1) * 0.5  # Vary sleep between 7-8 hours
+            base_stress = 30 + (i % 5) * 5  # Vary stress between 30-55
+            base_steps = 8000 + (i % 7) * 500  # Vary steps between 8000-11000
             
-            if not existing:
-                # Generate realistic metrics
-                base_sleep = 7.5 + (i % 3 - 1) * 0.5  # Vary sleep between 7-8 hours
-                base_stress = 30 + (i % 5) * 5  # Vary stress between 30-55
-                base_steps = 8000 + (i % 7) * 500  # Vary steps between 8000-11000
-                
-                metric = MetricSample(
-                    user_id=demo_user.id,
-                    date=metric_date,
-                    sleep_h=base_sleep,
-                    stress=base_stress,
-                    steps=base_steps,
-                    cardio=45 + (i % 3) * 5,
-                    active_min=35 + (i % 4) * 5,
-                    distance_km=6.0 + (i % 3) * 0.5,
-                    calories=2200 + (i % 5) * 50
-                )
-                session.add(metric)
+            metric_rows.append(dict(
+                user_id=demo_user.id,
+                date=metric_date,
+                sleep_h=base_sleep,
+                stress=base_stress,
+                steps=base_steps,
+                cardio=45 + (i % 3) * 5,
+                active_min=35 + (i % 4) * 5,
+                distance_km=6.0 + (i % 3) * 0.5,
+                calories=2200 + (i % 5) * 50
+            ))
+        upsert_rows(session, MetricSample, metric_rows, ["user_id", "date"], overwrite=False)
         
         # Seed goals
         goals_data = [
@@ -153,28 +147,8 @@ def seed_database():
             )
             session.add(plan)
         
-        # Seed readiness snapshot for today
-        existing_snapshot = session.exec(
-            select(ReadinessSnapshot)
-            .where(ReadinessSnapshot.user_id == demo_user.id)
-            .where(ReadinessSnapshot.date == today)
-        ).first()
-        
-        if not existing_snapshot:
-            snapshot = ReadinessSnapshot(
-                user_id=demo_user.id,
-                date=today,
-                score=78,
-                status="moderate",
-                factors_json={
-                    "HRV": {"value": 74, "unit": "ms", "impact": "positive"},
-                    "Resting Heart Rate": {"value": 62, "unit": "bpm", "impact": "neutral"},
-                    "Sleep Quality": {"value": 82, "unit": "score", "impact": "positive"},
-                    "Muscle Soreness": {"value": "mild", "impact": "negative"}
-                },
-                recommendation="You're moderately recovered. A steady training session is fine, but avoid max-intensity efforts."
-            )
-            session.add(snapshot)
+        # Materialize readiness snapshots for the seeded days
+        refresh_after_ingest(session, demo_user.id, today - timedelta(days=29), today)
         
         session.commit()
         print("Database seeded successfully!")
@@ -19,7 +19,8 @@ import json
 
 def seed_database():
     """Seed the database with demo data"""
-    from db import engine
+    from db import engine, upsert_rows
+    from readiness_engine import refresh_after_ingest
     
     with Session(engine) as session:
         # Check if demo user already exists
@@ -45,9 +46,10 @@ def seed_database():
         if not existing_metrics:
             print("Adding sample metrics...")
             # Add 7 days of sample metrics
+            metric_rows = []
             for i in range(7):
                 metric_date = date.today() - timedelta(days=i)
-                metric = MetricSample(
+                metric_rows.append(dict(
                     user_id=demo_user.id,
                     date=metric_date,
                     sleep_h=7.5 + (i * 0.2),
@@ -57,8 +59,9 @@ def seed_database():
                     active_min=35 + (i * 1),
                     distance_km=6.2 + (i * 0.1),
                     calories=2200 + (i * 10)
-                )
-                session.add(metric)
+                ))
+            upsert_rows(session, MetricSample, metric_rows, ["user_id", "date"], overwrite=False)
+            refresh_after_ingest(session, demo_user.id, date.today() - timedelta(days=6), date.today())
             
             # Add sample goals
             goals_data = [
@@ -0,0 +1,68 @@
+"""
+Readiness snapshot materialization, against the scratch database (see conftest.py):
+
+    pytest test_readiness_engine.py
+"""
+
+from datetime import date, timedelta
+
+from sqlmodel import Session, select
+from analytics import load_history
+from db import create_db_and_tables, engine, upsert_rows
+from models import MetricSample, ReadinessSnapshot, User
+from readiness_engine import history_range, refresh_after_ingest, score_history
+
+def _user(session: Session, email: str) -> int:
+    user = User(email=email, name="Readiness Test")
+    session.add(user)
+    session.commit()
+    return user.id
+
+def _ingest(session: Session, user_id: int, days, active_min: int = 45):
+    rows = [
+        dict(user_id=user_id, date=day, sleep_h=7.2, stress=35, steps=9000, cardio=50, active_min=active_min)
+        for day in days
+    ]
+    upsert_rows(session, MetricSample, rows, ["user_id", "date"])
+    refresh_after_ingest(session, user_id, min(days), max(days))
+    session.commit()
+
+def _stored(session: Session, user_id: int, day: date):
+    return session.exec(
+        select(ReadinessSnapshot).where(ReadinessSnapshot.user_id == user_id).where(ReadinessSnapshot.date == day)
+    ).first()
+
+def _fresh(session: Session, user_id: int, day: date):
+    results, _ = score_history(load_history(session, user_id, *history_range(day)), day, day)
+    return results[day]
+
+def test_backfill_refreshes_later_snapshots():
+    create_db_and_tables()
+    today = date.today()
+    with Session(engine) as session:
+        user_id = _user(session, "backfill@example.com")
+        _ingest(session, user_id, [today - timedelta(days=i) for i in range(60)])
+        before = _stored(session, user_id, today).factors_json["Training Load"]["value"]
+
+        # A late, heavy session 15 days back only reaches today's snapshot through the training load
+        _ingest(session, user_id, [today - timedelta(days=15)], active_min=600)
+        session.expire_all()
+        stored = _stored(session, user_id, today)
+
+        assert stored.factors_json["Training Load"]["value"] != before
+        assert stored.factors_json == _fresh(session, user_id, today).factors
+        assert stored.score == _fresh(session, user_id, today).score
+
+def test_ingest_drops_stale_future_snapshots():
+    create_db_and_tables()
+    today = date.today()
+    later = today + timedelta(days=3)
+    with Session(engine) as session:
+        user_id = _user(session, "future@example.com")
+        _ingest(session, user_id, [today - timedelta(days=i) for i in range(40)])
+        session.add(ReadinessSnapshot(user_id=user_id, date=later, score=1, status="low", recommendation=""))
+        session.commit()
+
+        _ingest(session, user_id, [today], active_min=300)
+        session.expire_all()
+        assert _stored(session, user_id, later) is None
@@ -0,0 +1,46 @@
+"""
+Agent tool endpoints, run in-process against the scratch database (see conftest.py):
+
+    pytest test_tools.py
+"""
+
+from models import ToolLog
+
+def test_batch_unknown_user_fails_its_calls(client, agent, tool_log_rows):
+    response = client.post("/tools/batch", json={"calls": [
+        {"tool": "getCurrentMetrics", "args": {"user_id": "999"}},
+        {"tool": "getWorkoutHistory", "args": {"user_id": "nobody@x.com"}},
+        {"tool": "getCurrentMetrics", "args": {}},
+    ]}, headers=agent)
+
+    assert response.status_code == 200
+    unknown_id, unknown_email, demo = response.json()["results"]
+    assert unknown_id == {"tool": "getCurrentMetrics", "ok": False, "result": None, "error": "User '999' not found"}
+    assert unknown_email["ok"] is False
+    assert unknown_email["error"] == "User 'nobody@x.com' not found"
+    assert demo["ok"] is True
+
+    # Audited without a user, not as the demo user
+    rows = tool_log_rows(ToolLog.tool == "getWorkoutHistory")
+    assert [(row.user_id, row.payload_json["ok"]) for row in rows] == [(None, False)]
+
+def test_unknown_user_404_is_audited(client, agent, tool_log_rows):
+    response = client.post("/tools/getWorkoutPlan", json={"user_id": "404-nobody"}, headers=agent)
+
+    assert response.status_code == 404
+    rows = tool_log_rows(ToolLog.tool == "getWorkoutPlan")
+    assert [(row.user_id, row.payload_json["ok"], row.payload_json["status"], row.payload_json["error"]) for row in rows] == [
+        (None, False, 404, "User '404-nobody' not found")
+    ]
+
+def test_rejected_requests_are_audited_once(client, agent, tool_log_rows):
+    # Bad agent token, then a body that fails validation, then a handler failure
+    assert client.post("/tools/analyzePose", json={"user_id": "1"}, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.post("/tools/analyzePose", json={"user_id": "1", "keypoints": "not a list"}, headers=agent).status_code == 422
+    assert client.post("/tools/analyzePose", json={"user_id": "1"}, headers=agent).status_code == 400
+
+    rows = tool_log_rows(ToolLog.tool == "analyzePose", count=3)
+    assert [row.payload_json["status"] for row in rows] == [401, 422, 400]
+    assert all(row.payload_json["ok"] is False for row in rows)
+    assert rows[1].payload_json["args"] == {"user_id": "1"}
+    assert rows[2].user_id == 1
@@ -0,0 +1,90 @@
+"""
+In-process cache of serialized metrics timeline responses.
+
+Entries are keyed per user by the query that produced them (period, today's
+date, ...) and hold the JSON body with its strong ETag, so repeated polls skip
+the query and serialization entirely and conditional requests get a 304.
+Importing metrics for a user drops all of that user's entries.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from config import settings
+
+CacheKey = Tuple[int, Hashable]
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 If-None-Match check (weak comparison, as required for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+class TimelineCache:
+    """Thread-safe LRU of (body, etag) per (user, query)"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[CacheKey, Tuple[bytes, str]]" = OrderedDict()
+        # Bumped on invalidation so a response built from pre-import data is not stored
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+
+    def get(self, user_id: int, query: Hashable) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get((user_id, query))
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end((user_id, query))
+            self.counters["hits"] += 1
+            return entry
+
+    def generation(self, user_id: int) -> int:
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def put(self, user_id: int, query: Hashable, body: bytes, generation: int) -> str:
+        """Store a body built at the given generation and return its ETag"""
+        etag = make_etag(body)
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                return etag
+            self._entries[(user_id, query)] = (body, etag)
+            self._entries.move_to_end((user_id, query))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return etag
+
+    def record_not_modified(self):
+        with self._lock:
+            self.counters["not_modified"] += 1
+
+    def invalidate(self, user_id: int):
+        """Drop every cached timeline of a user"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+            self.counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+timeline_cache = TimelineCache(settings.timeline_cache_max_size)
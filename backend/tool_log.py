@@ -0,0 +1,241 @@
+"""
+Asynchronous, batched audit log of agent tool calls.
+
+Tool handlers queue one entry per call in O(1) (`put_nowait` on a bounded
+asyncio queue) and return immediately; a background task writes ToolLog rows
+in multi-row inserts once `tool_log_batch_size` entries are waiting or
+`tool_log_flush_interval` seconds have passed. When a burst fills the queue,
+new entries are dropped and counted rather than slowing down tool responses.
+On shutdown the queue is drained before the database engine is disposed.
+Failed calls are queued too, with ok=False, the error and its HTTP status;
+`audit_failed_request` covers calls rejected before their handler ran (agent
+token, unknown user, request validation).
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from pydantic_core import to_jsonable_python
+from sqlalchemy import insert
+from config import settings
+from db import async_engine
+from models import ToolLog
+
+# (tool, user_id, session_id, request_id, payload, created_at)
+Entry = Tuple[str, Optional[int], Optional[str], Optional[str], Dict[str, Any], datetime]
+
+# Longest shutdown waits for queued entries to be written
+DRAIN_TIMEOUT = 10.0
+
+TOOLS_PREFIX = "/tools/"
+# Request fields too large to audit (pose keypoint sequences and images)
+UNAUDITED_FIELDS = {"keypoints", "snapshot_base64"}
+
+class ToolLogWriter:
+    def __init__(self, queue_size: int, batch_size: int, flush_interval: float):
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.counters = {"enqueued": 0, "written": 0, "dropped": 0, "batches": 0, "write_failures": 0}
+        self._flush_max = 0.0
+
+    def enqueue(
+        self,
+        tool: str,
+        user_id: Optional[int],
+        session_id: Optional[str],
+        request_id: Optional[str],
+        payload: Dict[str, Any],
+    ) -> bool:
+        """Queue one audit entry without blocking; False if it was dropped"""
+        if self._queue is None or self._closing:
+            return False
+        try:
+            self._queue.put_nowait((tool, user_id, session_id, request_id, payload, datetime.utcnow()))
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            return False
+        self.counters["enqueued"] += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(self.queue_size)
+            self._batch_ready = asyncio.Event()
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop accepting entries and write out everything already queued"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._batch_ready.set()
+        try:
+            await asyncio.wait_for(self._queue.join(), DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⚠️  Tool log drain timed out, {self._queue.qsize()} entries not written")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._queue = None
+
+    async def _run(self):
+        while True:
+            entry = await self._queue.get()
+            # Wait for a full batch, the flush interval or shutdown, whichever comes first
+            if self._queue.qsize() + 1 < self.batch_size and not self._closing:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            batch = [entry]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[Entry]):
+        rows = [
+            {
+                "tool": tool,
+                "user_id": user_id,
+                "session_id": session_id,
+                "request_id": request_id,
+                # Request models are only converted here, off the request path
+                "payload_json": to_jsonable_python(payload),
+                "created_at": created_at,
+            }
+            for tool, user_id, session_id, request_id, payload, created_at in batch
+        ]
+        started = time.perf_counter()
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(insert(ToolLog.__table__), rows)
+        except Exception as e:
+            self.counters["write_failures"] += len(rows)
+            print(f"⚠️  Could not write {len(rows)} tool log rows: {e}")
+            return
+        self._flush_max = max(self._flush_max, time.perf_counter() - started)
+        self.counters["written"] += len(rows)
+        self.counters["batches"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self.counters["batches"]
+        return {
+            **self.counters,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "batch_size": self.batch_size,
+            "avg_batch": round(self.counters["written"] / batches, 1) if batches else 0.0,
+            "max_flush_ms": round(self._flush_max * 1000, 1),
+        }
+
+tool_log = (
+    ToolLogWriter(settings.tool_log_queue_size, settings.tool_log_batch_size, settings.tool_log_flush_interval)
+    if settings.tool_log_enabled else None
+)
+
+class ToolAudit:
+    """Per-request handle that queues one ToolLog entry per tool call"""
+
+    def __init__(self, session_id: Optional[str], request_id: Optional[str]):
+        self.session_id = session_id
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.failed = False
+
+    def payload(self, args: Any, ok: bool = True, error: Optional[str] = None, **extra: Any) -> Dict[str, Any]:
+        return {
+            "args": args,
+            "ok": ok,
+            "error": error,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            **extra,
+        }
+
+    def record(
+        self,
+        tool: str,
+        user_id: Optional[int],
+        args: Any,
+        ok: bool = True,
+        error: Optional[str] = None,
+        session_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+        **extra: Any,
+    ):
+        """Queue the call for the background writer"""
+        if tool_log is None:
+            return
+        payload = self.payload(args, ok, error, **extra)
+        tool_log.enqueue(tool, user_id, session_id or self.session_id, request_id or self.request_id, payload)
+
+    @contextmanager
+    def failures(
+        self,
+        tool: str,
+        user_id: Optional[int],
+        args: Any,
+        request_id: Optional[str] = None,
+    ) -> Iterator[None]:
+        """Record the call with ok=False if the block raises; successes are recorded by the handler"""
+        try:
+            yield
+        except HTTPException as e:
+            self.failed = True
+            self.record(tool, user_id, args, ok=False, error=str(e.detail), request_id=request_id, status=e.status_code)
+            raise
+        except Exception as e:
+            self.failed = True
+            self.record(tool, user_id, args, ok=False, error=f"{type(e).__name__}: {e}", request_id=request_id, status=500)
+            raise
+
+async def get_tool_audit(
+    request: Request,
+    x_session_id: Optional[str] = Header(None),
+    x_request_id: Optional[str] = Header(None),
+) -> ToolAudit:
+    """Audit handle for a tool request, tagged with the agent's X-Session-ID / X-Request-ID headers"""
+    audit = ToolAudit(x_session_id, x_request_id)
+    # Lets audit_failed_request tell whether the handler already recorded a failure
+    request.state.tool_audit = audit
+    return audit
+
+def audit_failed_request(request: Request, exc: Exception):
+    """Record a failed tool call that its handler didn't: rejected by a dependency or request validation"""
+    if tool_log is None or request.method != "POST" or not request.url.path.startswith(TOOLS_PREFIX):
+        return
+    audit = getattr(request.state, "tool_audit", None)
+    if audit is not None and audit.failed:
+        return
+    if audit is None:
+        audit = ToolAudit(request.headers.get("x-session-id"), request.headers.get("x-request-id"))
+
+    tool = request.url.path[len(TOOLS_PREFIX):]
+    if isinstance(exc, RequestValidationError):
+        error = "; ".join(
+            f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in exc.errors()
+        )
+        args = exc.body
+        if isinstance(args, dict):
+            args = {key: value for key, value in args.items() if key not in UNAUDITED_FIELDS}
+        audit.record(tool, None, args, ok=False, error=error, status=422)
+    elif isinstance(exc, StarletteHTTPException):
+        audit.record(tool, None, None, ok=False, error=str(exc.detail), status=exc.status_code)
@@ -0,0 +1,227 @@
+"""
+Content-addressed cache for synthesized TTS audio.
+
+Entries are keyed by a hash of everything that affects the audio (text, voice,
+model and voice settings). Recently used clips live in an in-memory LRU tier
+with a byte budget; clips evicted from memory spill to a disk tier that has
+its own byte budget and evicts least recently used files first.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+
+SUFFIX = ".audio"
+
+def tts_cache_key(text: str, voice_id: str, model: str, voice_settings: Dict[str, Any]) -> str:
+    """Stable hash of the synthesis inputs"""
+    raw = json.dumps(
+        {"text": text, "voice_id": voice_id, "model": model, "voice_settings": voice_settings},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """
+    Two-tier (memory LRU + disk) audio cache with byte budgets.
+    The lock only guards the in-memory index and counters; file reads, writes and
+    deletes run in worker threads so callers on the event loop never block on disk.
+    """
+
+    def __init__(self, memory_bytes: int, disk_dir: Optional[str], disk_bytes: int):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes if disk_dir else 0
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_used = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_spills": 0,
+            "disk_evictions": 0,
+            "rejected_too_large": 0,
+        }
+
+    async def open(self):
+        """Create the disk directory and index the clips already in it (called at startup)"""
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._load_disk_index)
+
+    def _load_disk_index(self):
+        """Rebuild the disk LRU from existing files, oldest access first"""
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.disk_dir.glob(f"*{SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        with self._lock:
+            for _, key, size in sorted(files):
+                if key not in self._disk:
+                    self._disk[key] = size
+                    self._disk_used += size
+            doomed = self._evict_disk()
+        self._unlink(doomed)
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}{SUFFIX}"
+
+    async def get(self, key: str) -> Tuple[Optional[bytes], str]:
+        """Return (audio, tier); tier is memory, disk or miss"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return data, "memory"
+            on_disk = key in self._disk
+
+        if on_disk:
+            try:
+                data = await asyncio.to_thread(self._read, key)
+            except OSError:
+                with self._lock:
+                    self._forget_disk(key)
+            else:
+                with self._lock:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self.counters["disk_hits"] += 1
+                    spills = self._put_memory(key, data)
+                await self._spill(spills)
+                return data, "disk"
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None, "miss"
+
+    def contains(self, key: str) -> bool:
+        """Membership check that does not touch LRU order or hit counters"""
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    async def put(self, key: str, data: bytes):
+        with self._lock:
+            if len(data) > max(self.memory_bytes, self.disk_bytes):
+                self.counters["rejected_too_large"] += 1
+                return
+            self.counters["stores"] += 1
+            if len(data) > self.memory_bytes:
+                direct = True
+                spills = [(key, data)]
+            else:
+                direct = False
+                spills = self._put_memory(key, data)
+        await self._spill(spills, direct)
+
+    def _put_memory(self, key: str, data: bytes) -> List[Tuple[str, bytes]]:
+        """Insert into the memory tier; returns evicted clips that should spill to disk. Lock held."""
+        if len(data) > self.memory_bytes:
+            return []
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old)
+        self._memory[key] = data
+        self._memory_used += len(data)
+        spills = []
+        while self._memory_used > self.memory_bytes:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+            self.counters["memory_evictions"] += 1
+            if evicted_key not in self._disk:
+                spills.append((evicted_key, evicted))
+        return spills
+
+    async def _spill(self, entries: List[Tuple[str, bytes]], direct: bool = False):
+        """Write clips to the disk tier off the event loop, then index them"""
+        if self.disk_dir is None:
+            return
+        for key, data in entries:
+            if len(data) > self.disk_bytes or not await asyncio.to_thread(self._write, key, data):
+                continue
+            with self._lock:
+                self._disk_used += len(data) - self._disk.pop(key, 0)
+                self._disk[key] = len(data)
+                if not direct:
+                    self.counters["disk_spills"] += 1
+                doomed = self._evict_disk()
+            if doomed:
+                await asyncio.to_thread(self._unlink, doomed)
+
+    def _evict_disk(self) -> List[str]:
+        """Drop least recently used clips from the disk index; returns their keys to unlink. Lock held."""
+        doomed = []
+        while self._disk_used > self.disk_bytes and self._disk:
+            key = next(iter(self._disk))
+            self._forget_disk(key)
+            doomed.append(key)
+            self.counters["disk_evictions"] += 1
+        return doomed
+
+    def _forget_disk(self, key: str):
+        self._disk_used -= self._disk.pop(key, 0)
+
+    # File I/O, run in worker threads
+
+    def _read(self, key: str) -> bytes:
+        path = self._path(key)
+        data = path.read_bytes()
+        os.utime(path)
+        return data
+
+    def _write(self, key: str, data: bytes) -> bool:
+        path = self._path(key)
+        tmp = path.with_suffix(f".{secrets.token_hex(4)}.tmp")
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️  TTS cache could not write {path}: {e}")
+            return False
+        return True
+
+    def _unlink(self, keys: List[str]):
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "memory_budget_bytes": self.memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used,
+                "disk_budget_bytes": self.disk_bytes,
+            }
+
+tts_cache: Optional[TTSCache] = TTSCache(
+    settings.tts_cache_memory_bytes,
+    settings.tts_cache_dir or None,
+    settings.tts_cache_disk_bytes,
+) if settings.tts_cache_enabled else None
@@ -0,0 +1,52 @@
+"""
+Background pre-synthesis of canned coaching phrases.
+
+The readiness recommendations come from a small fixed set, so they are
+synthesized into the TTS cache right after startup and the first request for
+any of them is served from cache. Runs as a background task with bounded
+concurrency and never delays server readiness.
+"""
+
+import asyncio
+import time
+from typing import Iterable, List, Optional
+
+import httpx
+from fastapi import HTTPException
+from config import settings
+from readiness_engine import RECOMMENDATIONS
+from routers.tools.get_current_metrics import NO_DATA_RECOMMENDATION
+from tts_cache import tts_cache
+from voice import API_KEY, open_tts_stream, tee_to_cache, tts_key
+
+def canned_phrases() -> List[str]:
+    """Every fixed recommendation string the API can return, deduplicated"""
+    phrases = [*RECOMMENDATIONS.values(), NO_DATA_RECOMMENDATION]
+    return list(dict.fromkeys(phrases))
+
+async def _warm_phrase(text: str, semaphore: asyncio.Semaphore) -> str:
+    key = tts_key(text)
+    if tts_cache.contains(key):
+        return "cached"
+    async with semaphore:
+        try:
+            resp = await open_tts_stream(text)
+            async for _ in tee_to_cache(resp, key):
+                pass
+        except (HTTPException, httpx.HTTPError) as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            print(f"⚠️  TTS warmup failed for {text[:40]!r}: {detail}")
+            return "failed"
+    return "synthesized"
+
+async def warm_tts_cache(phrases: Optional[Iterable[str]] = None):
+    """Synthesize canned phrases missing from the TTS cache"""
+    if tts_cache is None or not API_KEY:
+        print("⏭️  TTS warmup skipped (cache disabled or ElevenLabs not configured)")
+        return
+    phrases = list(phrases) if phrases is not None else canned_phrases()
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, settings.tts_warmup_concurrency))
+    outcomes = await asyncio.gather(*[_warm_phrase(text, semaphore) for text in phrases])
+    counts = {outcome: outcomes.count(outcome) for outcome in set(outcomes)}
+    print(f"🔊 TTS warmup done in {time.perf_counter() - started:.1f}s: {counts}")
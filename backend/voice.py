@@ -1,7 +1,11 @@
 import os, httpx
+from typing import AsyncIterator, Optional
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
+from config import settings
+from http_client import get_http_client
+from tts_cache import tts_cache, tts_cache_key
 
 load_dotenv()
 router = APIRouter()
@@ -10,18 +14,73 @@ API_KEY = os.getenv("ELEVENLABS_API_KEY")
 VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
 MODEL = os.getenv("ELEVENLABS_MODEL", "eleven_multilingual_v2")
 HEADERS = {"xi-api-key": API_KEY} if API_KEY else {}
+VOICE_SETTINGS = {"stability": 0.4, "similarity_boost": 0.7}
+MEDIA_TYPE = "audio/mpeg"
 
-@router.post("/tts")
-async def tts(text: str):
+def tts_key(text: str) -> str:
+    return tts_cache_key(text, VOICE_ID, MODEL, VOICE_SETTINGS)
+
+async def open_tts_stream(text: str) -> httpx.Response:
+    """Start an upstream synthesis and return the response once headers arrive; caller must aclose() it"""
     if not API_KEY or not VOICE_ID:
         raise HTTPException(500, "ElevenLabs not configured")
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}/stream"
-    payload = {"text": text, "model_id": MODEL, "voice_settings": {"stability": 0.4, "similarity_boost": 0.7}}
-    async with httpx.AsyncClient(timeout=None) as client:
-        resp = await client.post(url, headers=HEADERS, json=payload)
-        if resp.status_code != 200:
-            raise HTTPException(resp.status_code, await resp.aread())
-        async def gen():
-            async for chunk in resp.aiter_bytes():
-                yield chunk
-        return StreamingResponse(gen(), media_type="audio/mpeg")
+    url = f"{settings.elevenlabs_base_url.rstrip('/')}/v1/text-to-speech/{VOICE_ID}/stream"
+    payload = {"text": text, "model_id": MODEL, "voice_settings": VOICE_SETTINGS}
+
+    client = get_http_client()
+    try:
+        # stream=True returns as soon as headers arrive; the body is relayed chunk by chunk
+        resp = await client.send(client.build_request("POST", url, headers=HEADERS, json=payload), stream=True)
+    except httpx.TimeoutException:
+        raise HTTPException(504, "ElevenLabs TTS timed out")
+    except httpx.HTTPError as e:
+        raise HTTPException(502, f"ElevenLabs TTS unavailable: {e}")
+
+    if resp.status_code != 200:
+        detail = await resp.aread()
+        await resp.aclose()
+        raise HTTPException(resp.status_code, detail.decode(errors="replace"))
+    return resp
+
+async def tee_to_cache(resp: httpx.Response, key: Optional[str]) -> AsyncIterator[bytes]:
+    """Relay upstream audio, storing it in the cache once the whole clip has arrived"""
+    chunks = []
+    complete = False
+    try:
+        async for chunk in resp.aiter_bytes():
+            if key is not None:
+                chunks.append(chunk)
+            yield chunk
+        complete = True
+    finally:
+        # Also runs if the client disconnects mid-stream; partial clips are never cached
+        await resp.aclose()
+        if complete and chunks and tts_cache is not None:
+            await tts_cache.put(key, b"".join(chunks))
+
+def _iter_cached(data: bytes):
+    size = settings.tts_stream_chunk_bytes
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+@router.post("/tts")
+async def tts(text: str):
+    key = tts_key(text) if tts_cache is not None else None
+    if key is not None:
+        data, tier = await tts_cache.get(key)
+        if data is not None:
+            return StreamingResponse(_iter_cached(data), media_type=MEDIA_TYPE, headers={"X-TTS-Cache": tier})
+
+    resp = await open_tts_stream(text)
+    return StreamingResponse(
+        tee_to_cache(resp, key),
+        media_type=resp.headers.get("content-type", MEDIA_TYPE),
+        headers={"X-TTS-Cache": "miss" if key is not None else "disabled"},
+    )
+
+@router.get("/tts/cache/stats")
+async def tts_cache_stats():
+    """TTS cache hit rates, sizes and eviction counters"""
+    if tts_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **tts_cache.stats()}
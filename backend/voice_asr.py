@@ -1,12 +1,301 @@
-import os, asyncio, json, websockets
+import os, asyncio, json, time, websockets
+import numpy as np
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, List, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from dotenv import load_dotenv
+from config import settings
+from asr_pool import ASRPool, ASRPoolTimeout
 
 load_dotenv()
 router = APIRouter()
 
-ELEVEN_ASR_URL = "wss://api.elevenlabs.io/v1/convai/realtime"
+ELEVEN_ASR_URL = settings.elevenlabs_asr_url
 ELEVEN_API_KEY = os.getenv("ELEVENLABS_API_KEY" )
+QUEUE_POLICIES = ("drop_oldest", "coalesce")
+
+asr_pool = ASRPool(
+    f"{ELEVEN_ASR_URL}?model_id=eleven_turbo_v2",
+    {"xi-api-key": ELEVEN_API_KEY} if ELEVEN_API_KEY else {},
+    warm_size=settings.asr_pool_warm_size if ELEVEN_API_KEY else 0,
+    max_sessions=settings.asr_max_sessions,
+    acquire_timeout=settings.asr_session_queue_timeout,
+    health_interval=settings.asr_pool_health_interval,
+    max_idle_age=settings.asr_pool_max_idle_age,
+)
+
+@dataclass
+class RelayStats:
+    """Per-connection relay counters"""
+    frames_in: int = 0
+    bytes_in: int = 0
+    frames_out: int = 0
+    bytes_out: int = 0
+    frames_dropped: int = 0
+    frames_coalesced: int = 0
+    frames_silence_skipped: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    upstream_messages: int = 0
+    transcripts_sent: int = 0
+    bytes_to_client: int = 0
+    close_reason: Optional[str] = None
+    started: float = field(default_factory=time.monotonic)
+
+    def as_dict(self) -> Dict[str, object]:
+        data = asdict(self)
+        data["duration_s"] = round(time.monotonic() - data.pop("started"), 2)
+        return data
+
+# Live relay stats by connection id
+ACTIVE_RELAYS: Dict[int, RelayStats] = {}
+
+class AudioQueue:
+    """
+    Bounded audio frame queue between the client reader and the upstream writer.
+    When full, "coalesce" merges the new frame into the newest queued one and
+    "drop_oldest" discards the oldest frame; the byte cap always drops oldest.
+    """
+
+    def __init__(self, stats: RelayStats, max_frames: int, max_bytes: int, policy: str):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown ASR queue policy: {policy}")
+        self.stats = stats
+        self.max_frames = max(1, max_frames)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._frames: Deque[bytes] = deque()
+        self._bytes = 0
+        self._ready = asyncio.Event()
+
+    def put_nowait(self, frame: bytes):
+        if len(self._frames) >= self.max_frames:
+            if self.policy == "coalesce":
+                self._frames[-1] += frame
+                self._bytes += len(frame)
+                self.stats.frames_coalesced += 1
+            else:
+                self._bytes -= len(self._frames.popleft())
+                self.stats.frames_dropped += 1
+                self._frames.append(frame)
+                self._bytes += len(frame)
+        else:
+            self._frames.append(frame)
+            self._bytes += len(frame)
+        while self._bytes > self.max_bytes and len(self._frames) > 1:
+            self._bytes -= len(self._frames.popleft())
+            self.stats.frames_dropped += 1
+        self.stats.queue_depth = len(self._frames)
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.stats.queue_depth)
+        self._ready.set()
+
+    async def get(self) -> bytes:
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+        frame = self._frames.popleft()
+        self._bytes -= len(frame)
+        self.stats.queue_depth = len(self._frames)
+        return frame
+
+class PCMFramer:
+    """
+    Re-frames client PCM16 mono audio into fixed-duration frames at the upstream
+    sample rate and drops silence with an energy VAD. A short pre-roll before
+    speech onset and a hangover after it are kept so words are not clipped.
+    """
+
+    def __init__(
+        self,
+        stats: RelayStats,
+        input_rate: int,
+        output_rate: int,
+        frame_ms: int,
+        vad: bool,
+        threshold_dbfs: float,
+        preroll_ms: int,
+        hangover_ms: int,
+    ):
+        self.stats = stats
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.in_samples = input_rate * frame_ms // 1000
+        self.out_samples = output_rate * frame_ms // 1000
+        self.vad = vad
+        self.threshold = 32768.0 * 10 ** (threshold_dbfs / 20)
+        self._pending = bytearray()
+        self._preroll: Deque[bytes] = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._hangover_frames = hangover_ms // frame_ms
+        self._hangover = 0
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """Buffer client bytes and return the complete frames ready to forward"""
+        self._pending += data
+        count = len(self._pending) // (2 * self.in_samples)
+        if not count:
+            return []
+        cut = count * 2 * self.in_samples
+        samples = np.frombuffer(bytes(self._pending[:cut]), dtype="<i2").reshape(count, self.in_samples)
+        del self._pending[:cut]
+        return self._gate(self._resample(samples))
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        if self.input_rate == self.output_rate:
+            return samples
+        count = samples.shape[0]
+        if self.input_rate % self.output_rate == 0:
+            # Integer decimation: average each group of input samples (cheap low-pass)
+            factor = self.input_rate // self.output_rate
+            resampled = samples.reshape(count, self.out_samples, factor).mean(axis=2)
+        else:
+            flat = samples.ravel().astype(np.float32)
+            positions = np.arange(count * self.out_samples) * (self.input_rate / self.output_rate)
+            resampled = np.interp(positions, np.arange(flat.size), flat).reshape(count, self.out_samples)
+        return np.clip(np.rint(resampled), -32768, 32767).astype("<i2")
+
+    def _gate(self, frames: np.ndarray) -> List[bytes]:
+        if not self.vad:
+            return [frame.tobytes() for frame in frames]
+        levels = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+        out = []
+        for frame, level in zip(frames, levels):
+            data = frame.tobytes()
+            if level >= self.threshold:
+                # Speech onset: release the pre-roll first
+                self.stats.frames_silence_skipped -= len(self._preroll)
+                out.extend(self._preroll)
+                self._preroll.clear()
+                self._hangover = self._hangover_frames
+                out.append(data)
+            elif self._hangover > 0:
+                self._hangover -= 1
+                out.append(data)
+            else:
+                self._preroll.append(data)
+                self.stats.frames_silence_skipped += 1
+        return out
+
+class TranscriptDiffer:
+    """
+    Turns cumulative partial transcripts into delta events so each character is
+    sent about once: "append" extends the text, "replace" rewrites it from a
+    character offset (snapped to a word start) when the hypothesis is revised,
+    and "final" commits the utterance and starts the next one from empty.
+    """
+
+    def __init__(self):
+        self.sent = ""
+
+    def update(self, text: str, final: bool = False) -> List[Dict[str, object]]:
+        events: List[Dict[str, object]] = []
+        if text.startswith(self.sent):
+            if len(text) > len(self.sent):
+                events.append({"type": "append", "text": text[len(self.sent):]})
+        else:
+            # Common prefix, then back up to the start of the diverging word
+            stable = 0
+            limit = min(len(text), len(self.sent))
+            while stable < limit and text[stable] == self.sent[stable]:
+                stable += 1
+            stable = self.sent.rfind(" ", 0, stable) + 1
+            events.append({"type": "replace", "from": stable, "text": text[stable:]})
+        self.sent = text
+        if final:
+            events.append({"type": "final"})
+            self.sent = ""
+        return events
+
+async def client_to_queue(ws: WebSocket, framer: PCMFramer, queue: AudioQueue, stats: RelayStats):
+    """Read client audio frames into the queue; never blocks on the upstream"""
+    while True:
+        try:
+            message = await asyncio.wait_for(ws.receive(), timeout=settings.asr_idle_timeout)
+        except asyncio.TimeoutError:
+            stats.close_reason = "client idle timeout"
+            return
+        if message["type"] == "websocket.disconnect":
+            stats.close_reason = "client closed"
+            return
+        frame = message.get("bytes")
+        if not frame:
+            continue
+        stats.frames_in += 1
+        stats.bytes_in += len(frame)
+        for chunk in framer.feed(frame):
+            queue.put_nowait(chunk)
+
+async def queue_to_upstream(queue: AudioQueue, upstream, stats: RelayStats):
+    """Drain the queue to the upstream socket at whatever pace it accepts"""
+    while True:
+        frame = await queue.get()
+        await upstream.send(frame)
+        stats.frames_out += 1
+        stats.bytes_out += len(frame)
+
+async def upstream_to_client(ws: WebSocket, upstream, stats: RelayStats, differ: Optional[TranscriptDiffer] = None):
+    """Forward transcripts to the client, as full text or as deltas when a differ is given"""
+    async for msg in upstream:
+        stats.upstream_messages += 1
+        try:
+            data = json.loads(msg)
+        except (TypeError, ValueError):
+            continue
+        # NOTE: Adjust this to match ElevenLabs realtime payloads
+        if "transcript" not in data:
+            continue
+        if differ is None:
+            payloads = [{"text": data["transcript"]}]
+        else:
+            payloads = differ.update(data["transcript"] or "", bool(data.get("is_final") or data.get("final")))
+        for payload in payloads:
+            text = json.dumps(payload)
+            await ws.send_text(text)
+            stats.transcripts_sent += 1
+            stats.bytes_to_client += len(text)
+    stats.close_reason = stats.close_reason or "upstream closed"
+
+def make_framer(stats: RelayStats, input_rate: int) -> PCMFramer:
+    return PCMFramer(
+        stats,
+        input_rate=input_rate,
+        output_rate=settings.asr_upstream_sample_rate,
+        frame_ms=settings.asr_frame_ms,
+        vad=settings.asr_vad_enabled,
+        threshold_dbfs=settings.asr_vad_threshold_dbfs,
+        preroll_ms=settings.asr_vad_preroll_ms,
+        hangover_ms=settings.asr_vad_hangover_ms,
+    )
+
+async def relay(ws: WebSocket, upstream, stats: RelayStats, input_rate: int, delta: bool = False):
+    """Run the relay until either side finishes, then cancel the others"""
+    framer = make_framer(stats, input_rate)
+    queue = AudioQueue(stats, settings.asr_queue_max_frames, settings.asr_queue_max_bytes, settings.asr_queue_policy)
+    tasks = [
+        asyncio.create_task(client_to_queue(ws, framer, queue, stats)),
+        asyncio.create_task(queue_to_upstream(queue, upstream, stats)),
+        asyncio.create_task(upstream_to_client(ws, upstream, stats, TranscriptDiffer() if delta else None)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in done:
+        error = task.exception()
+        if isinstance(error, websockets.ConnectionClosed):
+            stats.close_reason = stats.close_reason or f"upstream closed ({error.code})"
+        elif isinstance(error, WebSocketDisconnect):
+            stats.close_reason = stats.close_reason or "client closed"
+        elif error is not None:
+            raise error
+
+async def _close_client(ws: WebSocket, code: int = 1000):
+    try:
+        await ws.close(code=code)
+    except RuntimeError:
+        pass  # Already closed
 
 @router.websocket("/asr")
 async def asr_ws(ws: WebSocket):
@@ -15,32 +304,44 @@ async def asr_ws(ws: WebSocket):
         await ws.send_text(json.dumps({"error":"Missing ELEVENLABS_API_KEY"}))
         await ws.close(); return
 
+    # Clients send PCM16 mono; browsers may not honour the requested sample rate
     try:
-        async with websockets.connect(f"{ELEVEN_ASR_URL}?model_id=eleven_turbo_v2", extra_headers={"xi-api-key": ELEVEN_API_KEY}) as eleven:
-            async def client_to_eleven():
-                try:
-                    while True:
-                        buf = await ws.receive_bytes()
-                        await eleven.send(buf)
-                except WebSocketDisconnect:
-                    await eleven.close()
-                except Exception:
-                    pass
-
-            async def eleven_to_client():
-                try:
-                    async for msg in eleven:
-                        try:
-                            data = json.loads(msg)
-                            # NOTE: Adjust this to match ElevenLabs realtime payloads
-                            if "transcript" in data:
-                                await ws.send_text(json.dumps({"text": data["transcript"]}))
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-
-            await asyncio.gather(client_to_eleven(), eleven_to_client())
+        input_rate = int(ws.query_params.get("sample_rate", settings.asr_input_sample_rate))
+        if not 8000 <= input_rate <= 96000:
+            raise ValueError
+    except ValueError:
+        await ws.send_text(json.dumps({"error": "sample_rate must be an integer between 8000 and 96000"}))
+        await ws.close(code=1003); return
+    # mode=delta streams append/replace/final events instead of the full transcript each time
+    delta = ws.query_params.get("mode") == "delta"
+
+    stats = RelayStats()
+    ACTIVE_RELAYS[id(ws)] = stats
+    try:
+        # Waits for a free upstream slot (bounded by the queue timeout) and reuses a pre-warmed connection
+        async with asr_pool.session() as eleven:
+            await relay(ws, eleven, stats, input_rate, delta)
+            await _close_client(ws)
+    except ASRPoolTimeout as e:
+        stats.close_reason = "busy"
+        await ws.send_text(json.dumps({"error": f"ASR busy: {e}"}))
+        await _close_client(ws, code=1013)
     except Exception as e:
-        await ws.send_text(json.dumps({"error": f"ASR relay error: {str(e)}"}))
-        await ws.close()
+        stats.close_reason = f"error: {e}"
+        try:
+            await ws.send_text(json.dumps({"error": f"ASR relay error: {str(e)}"}))
+        except Exception:
+            pass
+        await _close_client(ws, code=1011)
+    finally:
+        ACTIVE_RELAYS.pop(id(ws), None)
+        print(f"🎙️  ASR relay closed: {stats.as_dict()}")
+
+@router.get("/asr/stats")
+async def asr_stats():
+    """Upstream pool counters and those of the ASR relays currently open"""
+    return {
+        "pool": asr_pool.stats(),
+        "active": len(ACTIVE_RELAYS),
+        "relays": [stats.as_dict() for stats in ACTIVE_RELAYS.values()],
+    }
@@ -0,0 +1,183 @@
+"""
+Workout plan reads and optimistic-concurrency updates.
+
+The current week's plan is cached per user (parsed plan plus its serialized
+tool response), so repeated reads skip both the query and serialization.
+Updates apply an incremental JSON patch to the cached plan and write it with
+`UPDATE ... WHERE version = <version read>`: no locks are taken, and an
+update that lost a race to another writer re-reads the plan and re-applies
+its patch, or reports a conflict when the caller pinned `expected_version`.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from config import settings
+from json_patch import PatchError, apply_patch
+from models import WorkoutPlan
+from schemas.tools import WorkoutPlanDay
+
+plan_days_adapter = TypeAdapter(List[WorkoutPlanDay])
+
+class PlanConflict(Exception):
+    """The plan changed since the version the caller read"""
+
+    def __init__(self, message: str, version: int):
+        super().__init__(message)
+        self.version = version
+
+class InvalidPlan(ValueError):
+    """A patch produced a plan that doesn't match the plan schema"""
+
+def week_start_of(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+@dataclass
+class PlanEntry:
+    plan_id: Optional[int]
+    week_start: date
+    version: int  # 0 while no plan is stored
+    plan_json: Dict[str, Any]
+    body: Optional[bytes] = field(default=None, compare=False)  # serialized tool response, filled on first read
+
+class PlanCache:
+    """Thread-safe LRU of each user's current-week plan"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, PlanEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: int, week_start: date) -> Optional[PlanEntry]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry.week_start != week_start:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.counters["hits"] += 1
+            return entry
+
+    def put(self, user_id: int, entry: PlanEntry):
+        if entry.week_start != week_start_of(date.today()):
+            return
+        with self._lock:
+            current = self._entries.get(user_id)
+            # Never replace a newer version with an older read
+            if current is not None and current.week_start == entry.week_start and current.version > entry.version:
+                return
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+plan_cache = PlanCache(settings.plan_cache_max_size)
+
+async def load_plan(session: AsyncSession, user_id: int, week_start: date, use_cache: bool = True) -> PlanEntry:
+    """The user's plan for a week, from the cache when it holds the current week"""
+    if use_cache:
+        entry = plan_cache.get(user_id, week_start)
+        if entry is not None:
+            return entry
+
+    plan = (await session.exec(
+        select(WorkoutPlan)
+        .where(WorkoutPlan.user_id == user_id)
+        .where(WorkoutPlan.week_start == week_start)
+    )).first()
+    if plan is None:
+        entry = PlanEntry(None, week_start, 0, {"plan": []})
+    else:
+        entry = PlanEntry(plan.id, week_start, plan.version, plan.plan_json or {"plan": []})
+    plan_cache.put(user_id, entry)
+    return entry
+
+def patch_operations(changes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """RFC 6902 operations from `changes`: {"patch": [...]} or a {"/pointer": value} shorthand"""
+    if "patch" in changes:
+        operations = changes["patch"]
+        if not isinstance(operations, list):
+            raise PatchError("'patch' must be a list of operations")
+        return operations
+    if not changes or not all(key.startswith("/") for key in changes):
+        raise PatchError('changes must be {"patch": [...]} or a map of "/json/pointer" paths to values')
+    return [{"op": "add", "path": path, "value": value} for path, value in changes.items()]
+
+def _validated(plan_json: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        plan_days_adapter.validate_python(plan_json.get("plan"))
+    except ValidationError as exc:
+        raise InvalidPlan(f"Patched plan is invalid: {exc.errors()[0]['msg']} at {exc.errors()[0]['loc']}")
+    return plan_json
+
+async def update_plan(
+    session: AsyncSession,
+    user_id: int,
+    week_start: date,
+    operations: List[Dict[str, Any]],
+    expected_version: Optional[int] = None,
+) -> PlanEntry:
+    """
+    Apply a patch to the user's plan for a week and stage the write on the session (not committed).
+    Retries on lost races unless expected_version pins the version the patch was written against.
+    """
+    use_cache = True
+    for _ in range(settings.plan_update_max_retries + 1):
+        current = await load_plan(session, user_id, week_start, use_cache)
+        if expected_version is not None and current.version != expected_version:
+            if use_cache:
+                # The cache may be behind another worker's write; decide on a fresh read
+                use_cache = False
+                continue
+            raise PlanConflict(f"Plan is at version {current.version}, not {expected_version}", current.version)
+
+        plan_json = _validated(apply_patch(current.plan_json, operations))
+        try:
+            if current.plan_id is None:
+                plan = WorkoutPlan(user_id=user_id, week_start=week_start, plan_json=plan_json, version=1)
+                session.add(plan)
+                await session.flush()
+                return PlanEntry(plan.id, week_start, 1, plan_json)
+            result = await session.execute(
+                update(WorkoutPlan)
+                .where(WorkoutPlan.id == current.plan_id)
+                .where(WorkoutPlan.version == current.version)
+                .values(plan_json=plan_json, version=current.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                return PlanEntry(current.plan_id, week_start, current.version + 1, plan_json)
+        except IntegrityError:
+            # Another writer created this week's plan first
+            pass
+        await session.rollback()
+        plan_cache.invalidate(user_id)
+        use_cache = False
+        if expected_version is not None:
+            latest = await load_plan(session, user_id, week_start, use_cache=False)
+            raise PlanConflict(f"Plan was updated concurrently and is now at version {latest.version}", latest.version)
+    raise PlanConflict("Plan kept changing while updating, try again", current.version)